@@ -0,0 +1,65 @@
+import argparse
+import io
+import time
+import zipfile
+from pathlib import Path
+
+# Opens an FLA through a file object that sleeps on every read, standing in for a
+# network filesystem, and compares round trips with and without the block cache.
+
+#------------------------------------------------------------------------------------------------
+class ThrottledFile( io.RawIOBase ):
+  def __init__( self, path : Path, latency_s : float ) -> None:
+    self.raw       = open( path, 'rb' )
+    self.name      = str( path )
+    self.latency_s = latency_s
+    self.reads     = 0
+    self.bytes     = 0
+
+  def seekable( self ) -> bool:
+    return True
+
+  def readable( self ) -> bool:
+    return True
+
+  def tell( self ) -> int:
+    return self.raw.tell()
+
+  def seek( self, offset : int, whence : int = 0 ) -> int:
+    return self.raw.seek( offset, whence )
+
+  def read( self, n : int = -1 ) -> bytes:
+    time.sleep( self.latency_s )
+    data = self.raw.read( n )
+    self.reads += 1
+    self.bytes += len( data )
+    return data
+
+  def close( self ) -> None:
+    self.raw.close()
+    super().close()
+
+#------------------------------------------------------------------------------------------------
+def ReadAll( path : Path, latency_s : float, block_cache ) -> ThrottledFile:
+  throttled = ThrottledFile( path, latency_s )
+  fp = zipfile.BlockCachedFile( throttled, **block_cache ) if block_cache is not None else throttled
+  with zipfile.ZipFile( fp, 'r', is_adobe=True ) as fla_zip:
+    for info in fla_zip.infolist():
+      fla_zip.read( info )
+  return throttled
+
+#------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+  def ParseArgs():
+    parser = argparse.ArgumentParser()
+    parser.add_argument( '--fla', default='test_project.fla', help='FLA file to read' )
+    parser.add_argument( '--latency-ms', type=float, default=2.0, help='Delay added to every read' )
+    parser.add_argument( '--block-size', type=int, default=1 << 16, help='Block size of the cache' )
+    return parser.parse_args()
+  args = ParseArgs()
+
+  for label, block_cache in [ ( 'direct', None ), ( 'block cache', { 'block_size': args.block_size } ) ]:
+    start = time.perf_counter()
+    throttled = ReadAll( Path( args.fla ), args.latency_ms / 1000.0, block_cache )
+    elapsed = time.perf_counter() - start
+    print( f'{label:12} {throttled.reads:6} reads {throttled.bytes:10} bytes {elapsed * 1000.0:8.1f} ms' )
@@ -0,0 +1,33 @@
+import argparse
+import os
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+#------------------------------------------------------------------------------------------------
+def ExtractFla( fla_path : Path, out_path : Path, jobs : int = 1, force : bool = False ) -> int:
+  with zipfile.ZipFile( fla_path, 'r', is_adobe=True, use_mmap=True ) as fla_zip:
+    members = fla_zip.infolist()
+    fla_zip.extractall( out_path, members, max_workers=jobs, skip_unchanged=not force )
+  return len( members )
+
+#------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+  def ParseArgs():
+    parser = argparse.ArgumentParser( description='Unpacks an FLA into an XFL folder' )
+    parser.add_argument( '--fla', required=True, help='FLA file to unpack' )
+    parser.add_argument( '--out', help='Destination folder, defaults to a folder named after the FLA next to it' )
+    parser.add_argument( '--jobs', type=int, default=os.cpu_count() or 1, help='Number of members extracted in parallel' )
+    parser.add_argument( '--force', action='store_true', help='Rewrite files whose size and CRC already match' )
+    return parser.parse_args()
+  args = ParseArgs()
+
+  fla_path = Path( args.fla )
+  if not fla_path.is_file():
+    sys.exit( f'{fla_path} not found' )
+  out_path = Path( args.out ) if args.out else fla_path.with_suffix( '' )
+
+  start = time.perf_counter()
+  count = ExtractFla( fla_path, out_path, max( args.jobs, 1 ), args.force )
+  print( f'{count} members extracted to {out_path} in {time.perf_counter() - start:.2f}s' )
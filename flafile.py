@@ -1,10 +1,56 @@
-import zipfile
+import bisect
+import math
+import os
 import re
 import xml.etree.ElementTree as ET
+from array import array
+from contextlib import closing
+from functools import partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+from flastorage import OpenFlaStorage
 
-import pdb
+#------------------------------------------------------------------------------------------------
+# Reads the stream on a background thread into a bounded queue while the caller consumes the
+# chunks. Inflating releases the GIL, so decompression overlaps with whatever the caller does
+# with each chunk (e.g. parsing it) instead of running before it.
+def ReadChunksInBackground( stream : BinaryIO, chunk_size : int, depth : int = 4 ) -> Iterator[ bytes ]:
+  import queue
+  import threading
+
+  chunks : queue.Queue     = queue.Queue( maxsize=depth )
+  stop   : threading.Event = threading.Event()
+
+  def Put( item ) -> bool:
+    # gives up once the consumer has stopped, instead of blocking on a full queue forever
+    while not stop.is_set():
+      try:
+        chunks.put( item, timeout=0.05 )
+        return True
+      except queue.Full:
+        pass
+    return False
+
+  def Produce() -> None:
+    try:
+      while Put( chunk := stream.read( chunk_size ) ) and chunk:
+        pass
+    except BaseException as e:
+      Put( e )
+
+  producer = threading.Thread( target=Produce, name='ReadChunksInBackground', daemon=True )
+  producer.start()
+  try:
+    while True:
+      chunk = chunks.get()
+      if isinstance( chunk, BaseException ):
+        raise chunk
+      if not chunk:
+        return
+      yield chunk
+  finally:
+    stop.set()
+    producer.join()
 
 #------------------------------------------------------------------------------------------------
 class FlaEdge:
@@ -19,6 +65,191 @@ class FlaStraightEdge(FlaEdge):
     self.pointA = point_a
     self.pointB = point_b
 
+#------------------------------------------------------------------------------------------------
+class FlaQuadraticEdge(FlaEdge):
+  def __init__( self, fill_style: int, stroke_style : int, point_a : Tuple[ float, float ], control : Tuple[ float, float ], point_b : Tuple[ float, float ] ) -> None:
+    super().__init__( fill_style, stroke_style)
+    self.pointA  = point_a
+    self.control = control
+    self.pointB  = point_b
+
+#------------------------------------------------------------------------------------------------
+# Commands of the Edge 'edges' attribute: '!' moves to a point, '|' and '/' draw a line to one,
+# '[' and ']' draw a quadratic curve through a control point to one. Each match is a command and
+# its coordinates; 'S<n>' style change markers in between are skipped by the scan. Coordinates
+# are in twips, either decimal or '#' hex fixed point.
+EDGE_COMMAND_ARITY = { '!': 2, '|': 2, '/': 2, '[': 4, ']': 4 }
+EDGE_COMMAND_RE = re.compile( r'([!|/\[\]])([^!|/\[\]S]*)' )
+
+# Coordinates are kept as signed 32 bit, 24.8 fixed point twips, which is also the hex format:
+# '#1A.8' is 0x00001A80, i.e. 26.5 twips
+FIXED_POINT_ONE : int = 256
+
+def ParseEdgeFixed( token : str ) -> int:
+  if token[ 0 ] != '#':
+    return round( float( token ) * FIXED_POINT_ONE )
+  whole, _, fraction = token[ 1: ].partition( '.' )
+  value = int( whole.rjust( 6, '0' ) + fraction.ljust( 2, '0' ), 16 )
+  if value >= 1 << 31:
+    value -= 1 << 32
+  return value
+
+#------------------------------------------------------------------------------------------------
+# All edges of a shape, one row per segment in parallel array columns: the segment kind, start
+# point, control point (zero for straight segments), end point and styles. Coordinates are 24.8
+# fixed point twips (see FIXED_POINT_ONE). Renderers and exporters can use the columns directly;
+# indexing or iterating builds FlaStraightEdge / FlaQuadraticEdge objects on demand.
+class FlaEdgeBuffer:
+  STRAIGHT  : int = 0
+  QUADRATIC : int = 1
+
+  def __init__( self ) -> None:
+    self.kind        : array = array( 'B' )
+    self.x0          : array = array( 'i' )
+    self.y0          : array = array( 'i' )
+    self.cx          : array = array( 'i' )
+    self.cy          : array = array( 'i' )
+    self.x1          : array = array( 'i' )
+    self.y1          : array = array( 'i' )
+    self.fillStyle   : array = array( 'i' )
+    self.strokeStyle : array = array( 'i' )
+
+  def __len__( self ) -> int:
+    return len( self.kind )
+
+  def __getitem__( self, i : int ) -> FlaEdge:
+    one = float( FIXED_POINT_ONE )
+    point_a = ( self.x0[ i ] / one, self.y0[ i ] / one )
+    point_b = ( self.x1[ i ] / one, self.y1[ i ] / one )
+    if self.kind[ i ] == FlaEdgeBuffer.QUADRATIC:
+      return FlaQuadraticEdge( self.fillStyle[ i ], self.strokeStyle[ i ], point_a, ( self.cx[ i ] / one, self.cy[ i ] / one ), point_b )
+    return FlaStraightEdge( self.fillStyle[ i ], self.strokeStyle[ i ], point_a, point_b )
+
+  def __iter__( self ) -> Iterator[ FlaEdge ]:
+    return map( self.__getitem__, range( len( self ) ) )
+
+  # Walks the whole attribute once with the compiled command pattern. Rows are collected in one
+  # flat list and split into the columns with slices, rather than appended column by column.
+  def AppendEdges( self, edges_attr : str, fill_style_idx : int, stroke_style_idx : int ) -> None:
+    rows : List[ int ] = []
+    x, y = 0, 0
+    for command, args in EDGE_COMMAND_RE.findall( edges_attr ):
+      coords = args.split()
+      if '#' in args or '.' in args:
+        coords = [ ParseEdgeFixed( c ) for c in coords ]
+      else:
+        coords = [ int( c ) << 8 for c in coords ]
+
+      if len( coords ) != EDGE_COMMAND_ARITY[ command ]:
+        raise ValueError( f'expected {EDGE_COMMAND_ARITY[ command ]} coordinates after {command!r} in {edges_attr!r}' )
+      elif len( coords ) == 4:
+        rows += ( FlaEdgeBuffer.QUADRATIC, x, y, coords[ 0 ], coords[ 1 ], coords[ 2 ], coords[ 3 ] )
+        x, y = coords[ 2 ], coords[ 3 ]
+      else:
+        if command != '!':
+          rows += ( FlaEdgeBuffer.STRAIGHT, x, y, 0, 0, coords[ 0 ], coords[ 1 ] )
+        x, y = coords
+
+    count = len( rows ) // 7
+    for column, values in enumerate( ( self.kind, self.x0, self.y0, self.cx, self.cy, self.x1, self.y1 ) ):
+      values.extend( rows[ column::7 ] )
+    self.fillStyle.extend( array( 'i', [ fill_style_idx ] ) * count )
+    self.strokeStyle.extend( array( 'i', [ stroke_style_idx ] ) * count )
+
+#------------------------------------------------------------------------------------------------
+# The Edge 'cubics' attribute holds the cubic curves the 'edges' quadratics approximate:
+# '!x y' sets the start point, then each '(...;c1x,c1y c2x,c2y ex,ey ...q...);' group chains
+# cubic segments (two control points and an end point each) from it. The part before ';' and the
+# quadratic approximation after 'q'/'Q' are not needed and skipped.
+CUBIC_COMMAND_RE = re.compile( r'!\s*([^\s(!]+)\s+([^\s(!]+)|\(([^;)]*);([^)]*)\)' )
+CUBIC_QUADRATICS_RE = re.compile( r'[qQ]' )
+
+# Every cubic segment of a shape, one row per segment in array columns like FlaEdgeBuffer
+class FlaCubicBuffer:
+  def __init__( self ) -> None:
+    self.x0          : array = array( 'i' )
+    self.y0          : array = array( 'i' )
+    self.c1x         : array = array( 'i' )
+    self.c1y         : array = array( 'i' )
+    self.c2x         : array = array( 'i' )
+    self.c2y         : array = array( 'i' )
+    self.x1          : array = array( 'i' )
+    self.y1          : array = array( 'i' )
+    self.fillStyle   : array = array( 'i' )
+    self.strokeStyle : array = array( 'i' )
+
+  def __len__( self ) -> int:
+    return len( self.x0 )
+
+  def AppendCubics( self, cubics_attr : str, fill_style_idx : int, stroke_style_idx : int ) -> None:
+    rows : List[ int ] = []
+    x, y = 0, 0
+    for start_x, start_y, _, body in CUBIC_COMMAND_RE.findall( cubics_attr ):
+      if start_x:
+        x, y = ParseEdgeFixed( start_x ), ParseEdgeFixed( start_y )
+        continue
+      points = CUBIC_QUADRATICS_RE.split( body, 1 )[ 0 ].split()
+      if len( points ) % 3 != 0:
+        raise ValueError( f'expected control, control, end point triples in {cubics_attr!r}' )
+      coords = [ ParseEdgeFixed( c ) for point in points for c in point.split( ',' ) ]
+      if len( coords ) != 2 * len( points ):
+        raise ValueError( f'expected x,y points in {cubics_attr!r}' )
+      for i in range( 0, len( coords ), 6 ):
+        rows += ( x, y, *coords[ i : i + 6 ] )
+        x, y = coords[ i + 4 ], coords[ i + 5 ]
+
+    count = len( rows ) // 8
+    for column, values in enumerate( ( self.x0, self.y0, self.c1x, self.c1y, self.c2x, self.c2y, self.x1, self.y1 ) ):
+      values.extend( rows[ column::8 ] )
+    self.fillStyle.extend( array( 'i', [ fill_style_idx ] ) * count )
+    self.strokeStyle.extend( array( 'i', [ stroke_style_idx ] ) * count )
+
+#------------------------------------------------------------------------------------------------
+# Adaptive flattening: the curve is split in half (de Casteljau) until both control points are
+# within tolerance of the chord, and the end point of every flat piece is appended to points.
+# The start point is not appended. Curves are cut at most 2^MAX_FLATTEN_DEPTH times.
+MAX_FLATTEN_DEPTH : int = 16
+
+# Flattened outlines, one tuple of (x, y) points per edge or cubic
+Polylines = Tuple[ Tuple[ Tuple[ float, float ], ... ], ... ]
+
+def FlattenCubic( p0 : Tuple[ float, float ], p1 : Tuple[ float, float ], p2 : Tuple[ float, float ], p3 : Tuple[ float, float ],
+                  tolerance : float, points : List[ Tuple[ float, float ] ] ) -> None:
+  tolerance_sq = tolerance * tolerance
+  stack = [ ( p0, p1, p2, p3, 0 ) ]
+  while stack:
+    a, b, c, d, depth = stack.pop()
+    dx, dy = d[ 0 ] - a[ 0 ], d[ 1 ] - a[ 1 ]
+    chord_sq = dx * dx + dy * dy
+    if chord_sq > 1e-12:
+      # distances of the controls from the chord, both scaled by its length
+      d1 = abs( ( b[ 0 ] - d[ 0 ] ) * dy - ( b[ 1 ] - d[ 1 ] ) * dx )
+      d2 = abs( ( c[ 0 ] - d[ 0 ] ) * dy - ( c[ 1 ] - d[ 1 ] ) * dx )
+      flat = ( d1 + d2 ) * ( d1 + d2 ) <= tolerance_sq * chord_sq
+    else:
+      # closed loop: measure the controls against the start point instead
+      flat = max( ( b[ 0 ] - a[ 0 ] ) ** 2 + ( b[ 1 ] - a[ 1 ] ) ** 2,
+                  ( c[ 0 ] - a[ 0 ] ) ** 2 + ( c[ 1 ] - a[ 1 ] ) ** 2 ) <= tolerance_sq
+    if flat or depth >= MAX_FLATTEN_DEPTH:
+      points.append( d )
+      continue
+
+    ab   = ( ( a[ 0 ] + b[ 0 ] ) * 0.5, ( a[ 1 ] + b[ 1 ] ) * 0.5 )
+    bc   = ( ( b[ 0 ] + c[ 0 ] ) * 0.5, ( b[ 1 ] + c[ 1 ] ) * 0.5 )
+    cd   = ( ( c[ 0 ] + d[ 0 ] ) * 0.5, ( c[ 1 ] + d[ 1 ] ) * 0.5 )
+    abc  = ( ( ab[ 0 ] + bc[ 0 ] ) * 0.5, ( ab[ 1 ] + bc[ 1 ] ) * 0.5 )
+    bcd  = ( ( bc[ 0 ] + cd[ 0 ] ) * 0.5, ( bc[ 1 ] + cd[ 1 ] ) * 0.5 )
+    abcd = ( ( abc[ 0 ] + bcd[ 0 ] ) * 0.5, ( abc[ 1 ] + bcd[ 1 ] ) * 0.5 )
+    # second half first, so the first half is popped and emitted first
+    stack.append( ( abcd, bcd, cd, d, depth + 1 ) )
+    stack.append( ( a, ab, abc, abcd, depth + 1 ) )
+
+def FlattenQuadratic( p0 : Tuple[ float, float ], control : Tuple[ float, float ], p2 : Tuple[ float, float ],
+                      tolerance : float, points : List[ Tuple[ float, float ] ] ) -> None:
+  # the same curve as a cubic
+  c1 = ( p0[ 0 ] + ( control[ 0 ] - p0[ 0 ] ) * 2.0 / 3.0, p0[ 1 ] + ( control[ 1 ] - p0[ 1 ] ) * 2.0 / 3.0 )
+  c2 = ( p2[ 0 ] + ( control[ 0 ] - p2[ 0 ] ) * 2.0 / 3.0, p2[ 1 ] + ( control[ 1 ] - p2[ 1 ] ) * 2.0 / 3.0 )
+  FlattenCubic( p0, c1, c2, p2, tolerance, points )
 
 #------------------------------------------------------------------------------------------------
 class FlaMatrix:
@@ -132,111 +363,317 @@ class FlaShape(FlaElement):
         if stroke.find( f'{{{ns}}}SolidStroke' ) != None:
           self.strokes.append( FlaStrokeStyleSolid( stroke, ns ) )
 
-    self.edges = self.ReadEdges( shape_et, ns )
+    self.cubics     : FlaCubicBuffer = FlaCubicBuffer()
+    self.edges      : FlaEdgeBuffer  = self.ReadEdges( shape_et, ns )
+    self._flattened       : Dict[ float, Polylines ] = {}
+    self._flattenedCubics : Dict[ float, Polylines ] = {}
 
-  def ReadEdges( self, shape_et : ET, ns : str ) -> List[ FlaEdge ]:
-    fla_edges : List[ FlaEdge ] = []
+  # Cubic descriptions are read into self.cubics
+  def ReadEdges( self, shape_et : ET, ns : str ) -> FlaEdgeBuffer:
+    fla_edges : FlaEdgeBuffer = FlaEdgeBuffer()
 
     edges : ET = shape_et.find( f'{{{ns}}}edges' )
     if edges is not None:
       for edge in edges.findall( f'{{{ns}}}Edge' ):
-        if 'edges' in edge.attrib: # for now, ignore cubic descriptions
-          fill_style_idx   : int = int(edge.attrib['fillStyle1']) if 'fillStyle1' in edge.attrib else -1
-          stroke_style_idx : int = int(edge.attrib['strokeStyle']) if 'strokeStyle' in edge.attrib else -1
-  
-          edge_descs = edge.attrib['edges'].split('!')
-          edge_descs = [ e for e in edge_descs if len(e) > 0 ]
-          for e in edge_descs:
-            straight_match = re.search( r'(\-?\d+) (\-?\d+)\|(\-?\d+) (\-?\d+)', e )
-            if straight_match is not None:
-              fla_edges.append( FlaStraightEdge( fill_style_idx, stroke_style_idx, \
-                                                ( int( straight_match.group(1) ), int( straight_match.group(2) ) ), \
-                                                ( int( straight_match.group(3) ), int( straight_match.group(4) ) ) \
-                                               ) )
+        fill_style_idx   : int = int(edge.attrib['fillStyle1']) if 'fillStyle1' in edge.attrib else -1
+        stroke_style_idx : int = int(edge.attrib['strokeStyle']) if 'strokeStyle' in edge.attrib else -1
+        if 'edges' in edge.attrib:
+          fla_edges.AppendEdges( edge.attrib[ 'edges' ], fill_style_idx, stroke_style_idx )
+        if 'cubics' in edge.attrib:
+          self.cubics.AppendCubics( edge.attrib[ 'cubics' ], fill_style_idx, stroke_style_idx )
     return fla_edges
 
+  # Polylines (in twips) for every edge, with curves flattened to within tolerance twips. These
+  # are the styled outlines to draw.
+  def Flatten( self, tolerance : float ) -> Polylines:
+    return self._CachedPolylines( self._flattened, tolerance, self._FlattenEdges )
+
+  # Polylines for every cubic, flattened like Flatten(). The quadratic edges approximate these
+  # same curves, so this is the more exact outline, not extra geometry to draw on top of it.
+  def FlattenCubics( self, tolerance : float ) -> Polylines:
+    return self._CachedPolylines( self._flattenedCubics, tolerance, self._FlattenCubics )
+
+  # Results are kept for the last FLATTEN_CACHE_SIZE tolerances, each rounded down to a power of
+  # two so that zooming in small steps reuses them; rounding down only makes the outline finer
+  FLATTEN_CACHE_SIZE : int = 4
+
+  def _CachedPolylines( self, cache : Dict[ float, Polylines ], tolerance : float, flatten : Callable[ [ float ], Polylines ] ) -> Polylines:
+    if tolerance <= 0:
+      raise ValueError( 'tolerance must be positive' )
+    tolerance = math.ldexp( 1.0, math.frexp( tolerance )[ 1 ] - 1 )
+    # re-inserted on every use, so the first key is the least recently used one
+    polylines = cache.pop( tolerance, None )
+    if polylines is None:
+      polylines = flatten( tolerance )
+      if len( cache ) >= FlaShape.FLATTEN_CACHE_SIZE:
+        del cache[ next( iter( cache ) ) ]
+    cache[ tolerance ] = polylines
+    return polylines
+
+  def _FlattenEdges( self, tolerance : float ) -> Polylines:
+    one = float( FIXED_POINT_ONE )
+    polylines = []
+    edges = self.edges
+    for i in range( len( edges ) ):
+      points = [ ( edges.x0[ i ] / one, edges.y0[ i ] / one ) ]
+      end = ( edges.x1[ i ] / one, edges.y1[ i ] / one )
+      if edges.kind[ i ] == FlaEdgeBuffer.QUADRATIC:
+        FlattenQuadratic( points[ 0 ], ( edges.cx[ i ] / one, edges.cy[ i ] / one ), end, tolerance, points )
+      else:
+        points.append( end )
+      polylines.append( tuple( points ) )
+    return tuple( polylines )
+
+  def _FlattenCubics( self, tolerance : float ) -> Polylines:
+    one = float( FIXED_POINT_ONE )
+    polylines = []
+    cubics = self.cubics
+    for i in range( len( cubics ) ):
+      points = [ ( cubics.x0[ i ] / one, cubics.y0[ i ] / one ) ]
+      FlattenCubic( points[ 0 ], ( cubics.c1x[ i ] / one, cubics.c1y[ i ] / one ), ( cubics.c2x[ i ] / one, cubics.c2y[ i ] / one ),
+                    ( cubics.x1[ i ] / one, cubics.y1[ i ] / one ), tolerance, points )
+      polylines.append( tuple( points ) )
+    return tuple( polylines )
+
 #------------------------------------------------------------------------------------------------
-class FlaFile:
+# The attributes of the DOMDocument root element (size, frame rate, GUIDs, versions, ...). Built
+# on its own it is a cheap probe: DOMDocument.xml is only inflated a few KB at a time until the
+# root start tag has been parsed, and nothing below it is read.
+class FlaDocumentHeader:
   class PlayOptions:
     def __init__( self, fla_doc : ET ) -> None:
       self.playLoop         : bool = bool( fla_doc.attrib[ 'playOptionsPlayLoop' ] )
       self.playPages        : bool = bool( fla_doc.attrib[ 'playOptionsPlayPages' ] )
       self.playFrameActions : bool = bool( fla_doc.attrib[ 'playOptionsPlayFrameActions' ] )
 
+  # Size of the decompressed DOMDocument.xml chunks read while looking for the root start tag
+  PROBE_CHUNK_SIZE : int = 1 << 12
+
+  # source is the path of a .fla or an XFL folder, the bytes of a .fla, or a seekable binary
+  # stream over one; path is None unless a path was given
+  def __init__( self, source : Union[ Path, str, bytes, memoryview, BinaryIO ] ) -> None:
+    if isinstance( source, ( str, os.PathLike ) ):
+      source = Path( source )
+    self.path : Path = source if isinstance( source, Path ) else None
+
+    # kept so members can be read again later; a stream must stay open for that
+    self._source = self.path.absolute() if self.path is not None else source
+    with OpenFlaStorage( self._source ) as fla_storage:
+      with fla_storage.Open( 'DOMDocument.xml' ) as dom_doc_stream:
+        self._ReadDocument( dom_doc_stream )
+
+  def _ReadDocument( self, dom_doc_stream : BinaryIO ) -> None:
+    parser : ET.XMLPullParser = ET.XMLPullParser( events=( 'start', ) )
+    while chunk := dom_doc_stream.read( FlaDocumentHeader.PROBE_CHUNK_SIZE ):
+      parser.feed( chunk )
+      for _, element in parser.read_events():
+        self._ReadDocumentAttributes( element )
+        return
+    raise ET.ParseError( 'DOMDocument.xml has no root element' )
+
+  def _ReadDocumentAttributes( self, fla_doc : ET ) -> None:
+    self.backgroundColor   : str   = fla_doc.attrib[ 'backgroundColor' ] if 'backgroundColor' in fla_doc.attrib.keys() else '#ffffff'
+    self.width             : int   = int( fla_doc.attrib[ 'width' ] )
+    self.height            : int   = int( fla_doc.attrib[ 'height' ] )
+    self.frameRate         : int   = int( fla_doc.attrib[ 'frameRate' ] )
+    self.currentTimeline   : int   = int( fla_doc.attrib[ 'currentTimeline' ] )
+    self.creatorInfo       : str   = fla_doc.attrib[ 'creatorInfo' ]
+    self.platform          : str   = fla_doc.attrib[ 'platform' ]
+    self.versionInfo       : str   = fla_doc.attrib[ 'versionInfo' ]
+    self.majorVersion      : int   = int( fla_doc.attrib[ 'majorVersion' ] )
+    self.buildNumer        : int   = int( fla_doc.attrib[ 'buildNumber' ] )
+    self.viewAngle3D       : float = float( fla_doc.attrib[ 'viewAngle3D' ] )
+    self.vanishingPoint3DX : float = float( fla_doc.attrib[ 'vanishingPoint3DX' ] )
+    self.vanishingPoint3DY : float = float( fla_doc.attrib[ 'vanishingPoint3DY' ] )
+    self.rulerUnitType     : str   = fla_doc.attrib[ 'rulerUnitType' ] if 'rulerUnitType' in fla_doc.attrib.keys() else 'points'
+    self.nextSceneId       : int   = int( fla_doc.attrib[ 'nextSceneIdentifier' ] )
+    self.fileTypeGuid      : str   = fla_doc.attrib[ 'filetypeGUID' ]
+    self.fileGUID          : str   = fla_doc.attrib[ 'fileGUID' ]
+
+    self.playOptions : FlaDocumentHeader.PlayOptions = FlaDocumentHeader.PlayOptions( fla_doc )
+
+#------------------------------------------------------------------------------------------------
+class FlaFile( FlaDocumentHeader ):
   class Frame:
-    def __init__( self, frame_et : ET, ns : str ) -> None:
-      self.index   : int = int( frame_et.attrib[ 'index' ] )
+    # Elements are built on first access; until then only the <elements> subtree is kept.
+    # reload returns that subtree again from the document, so the frame can be evicted
+    def __init__( self, frame_et : ET, ns : str, reload : Callable[ [], ET ] = None ) -> None:
+      self.index    : int = int( frame_et.attrib[ 'index' ] )
+      self.duration : int = int( frame_et.attrib[ 'duration' ] ) if 'duration' in frame_et.attrib else 1
 
       # todo: look up actual key mode as an enum
-      self.keyMode : int = int( frame_et.attrib[ 'keyMode' ] )
-
-      self.elements : List[ FlaElement ] = []
-      elements = frame_et.find( f'{{{ns}}}elements' )
-      if elements is not None:
-        for element in elements.findall(f'{{{ns}}}DOMShape'):
-          self.elements.append( FlaShape( element, ns ) )
+      self.keyMode  : int = int( frame_et.attrib[ 'keyMode' ] )
+
+      self._ns          : str                = ns
+      self._elements_et : ET                 = frame_et.find( f'{{{ns}}}elements' )
+      self._elements    : List[ FlaElement ] = None
+      self._evicted     : bool               = False
+      self._reload      : Callable[ [], ET ] = reload
+
+    @property
+    def elements( self ) -> List[ FlaElement ]:
+      if self._elements is None:
+        if self._evicted:
+          self._elements_et = self._reload()
+          self._evicted     = False
+        self._elements = []
+        if self._elements_et is not None:
+          for element in self._elements_et.findall(f'{{{self._ns}}}DOMShape'):
+            self._elements.append( FlaShape( element, self._ns ) )
+        self._elements_et = None
+      return self._elements
+
+    @property
+    def touched( self ) -> bool:
+      return self._elements is not None
+
+    # Drops the unparsed elements of a frame that was never touched; returns whether it did.
+    # They are read back from the document if the frame is touched later.
+    def Evict( self ) -> bool:
+      if self.touched or self._evicted or self._reload is None:
+        return False
+      self._elements_et = None
+      self._evicted     = True
+      return True
 
   class Layer:
-    def __init__( self, layer_et : ET, ns : str ) -> None:
+    # frames may be passed in already built, e.g. by the streaming loader
+    def __init__( self, layer_et : ET, ns : str, frames : List[ 'FlaFile.Frame' ] = None ) -> None:
       self.name       : str  = layer_et.attrib[ 'name' ]
       self.color      : str  = layer_et.attrib[ 'color' ]
       self.current    : bool = bool( layer_et.attrib[ 'current' ] )
       self.isSelected : bool = bool( layer_et.attrib[ 'isSelected' ] )
       self.autoNamed  : bool = bool( layer_et.attrib[ 'autoNamed' ] ) if 'autoNamed' in layer_et.attrib else True
-      self.frames     : List[ FlaFile.Frame ] = []
+      self.frames     : List[ FlaFile.Frame ] = frames if frames is not None else []
 
-      frames = layer_et.find( f'{{{ns}}}frames' )
-      if frames is not None:
-        for frame in frames:
-          self.frames.append( FlaFile.Frame( frame, ns ) )
+      if frames is None:
+        frames_et = layer_et.find( f'{{{ns}}}frames' )
+        if frames_et is not None:
+          for frame in frames_et:
+            self.frames.append( FlaFile.Frame( frame, ns ) )
 
       self.frames.sort(key=lambda f: f.index)
 
+      # keyframe start indices, for finding the keyframe shown at a frame number with bisect
+      self._frameStarts : List[ int ] = [ frame.index for frame in self.frames ]
+      self.frameCount   : int = self.frames[ -1 ].index + self.frames[ -1 ].duration if self.frames else 0
+
+    # The keyframe whose span (index to index + duration) covers frame_idx, or None if the
+    # layer shows nothing there
+    def GetFrameAt( self, frame_idx : int ) -> 'FlaFile.Frame':
+      i = bisect.bisect_right( self._frameStarts, frame_idx ) - 1
+      if i >= 0 and frame_idx < self.frames[ i ].index + self.frames[ i ].duration:
+        return self.frames[ i ]
+      return None
+
   class Timeline:
-    def __init__( self, timeline_et : ET, ns : str ) -> None:
+    # layers may be passed in already built, e.g. by the streaming loader
+    def __init__( self, timeline_et : ET, ns : str, layers : List[ 'FlaFile.Layer' ] = None ) -> None:
       self.name              : str  = timeline_et.attrib[ 'name' ]
       self.layerDepthEnabled : bool = bool( timeline_et.attrib[ 'layerDepthEnabled' ] )
-      self.layers            : List[ FlaFile.Layer ] = []
-
-      layers = timeline_et.find( f'{{{ns}}}layers' )
-      if layers is not None:
-        for layer in layers:
-          self.layers.append( FlaFile.Layer( layer, ns ) )
-
-
-  def __init__( self, path : Path ) -> None:
-    with zipfile.ZipFile( path.absolute(), 'r', is_adobe=True ) as fla_archive:
-      dom_doc_str = fla_archive.read( 'DOMDocument.xml' )
-      fla_doc = ET.fromstring( dom_doc_str )
-
-      root_tag = fla_doc.tag
-      m = re.search( '\{(.*)\}DOMDocument', root_tag )
-      ns = m.group(1)
-
-      self.path              : Path  = path
-      self.backgroundColor   : str   = fla_doc.attrib[ 'backgroundColor' ] if 'backgroundColor' in fla_doc.attrib.keys() else '#ffffff'
-      self.width             : int   = int( fla_doc.attrib[ 'width' ] )
-      self.height            : int   = int( fla_doc.attrib[ 'height' ] )
-      self.frameRate         : int   = int( fla_doc.attrib[ 'frameRate' ] )
-      self.currentTimeline   : int   = int( fla_doc.attrib[ 'currentTimeline' ] )
-      self.creatorInfo       : str   = fla_doc.attrib[ 'creatorInfo' ]
-      self.platform          : str   = fla_doc.attrib[ 'platform' ]
-      self.versionInfo       : str   = fla_doc.attrib[ 'versionInfo' ]
-      self.majorVersion      : int   = int( fla_doc.attrib[ 'majorVersion' ] )
-      self.buildNumer        : int   = int( fla_doc.attrib[ 'buildNumber' ] )
-      self.viewAngle3D       : float = float( fla_doc.attrib[ 'viewAngle3D' ] )
-      self.vanishingPoint3DX : float = float( fla_doc.attrib[ 'vanishingPoint3DX' ] )
-      self.vanishingPoint3DY : float = float( fla_doc.attrib[ 'vanishingPoint3DY' ] )
-      self.rulerUnitType     : str   = fla_doc.attrib[ 'rulerUnitType' ] if 'rulerUnitType' in fla_doc.attrib.keys() else 'points'
-      self.nextSceneId       : int   = int( fla_doc.attrib[ 'nextSceneIdentifier' ] )
-      self.fileTypeGuid      : str   = fla_doc.attrib[ 'filetypeGUID' ]
-      self.fileGUID          : str   = fla_doc.attrib[ 'fileGUID' ]
-
-      self.playOptions : FlaFile.PlayOptions = FlaFile.PlayOptions( fla_doc )
-      
-      self.timelines : List[ FlaFile.Timeline ] = []
-      timelines = fla_doc.find( f'{{{ns}}}timelines' )
-
-      if timelines is not None:
-        for timeline in timelines:
-          self.timelines.append( FlaFile.Timeline( timeline, ns ) )
\ No newline at end of file
+      self.layers            : List[ FlaFile.Layer ] = layers if layers is not None else []
+
+      if layers is None:
+        layers_et = timeline_et.find( f'{{{ns}}}layers' )
+        if layers_et is not None:
+          for layer in layers_et:
+            self.layers.append( FlaFile.Layer( layer, ns ) )
+
+      self.frameCount : int = max( ( layer.frameCount for layer in self.layers ), default=0 )
+
+
+  # Size of the decompressed DOMDocument.xml chunks fed to the XML parser
+  STREAM_CHUNK_SIZE : int = 1 << 16
+
+  # pipelined inflates DOMDocument.xml on a background thread while it is parsed; by default
+  # that is only done when there is more than one CPU to run the two on
+  def __init__( self, source : Union[ Path, str, bytes, memoryview, BinaryIO ], pipelined : bool = None ) -> None:
+    self.timelines : List[ FlaFile.Timeline ] = []
+    self._pipelined : bool = pipelined if pipelined is not None else ( os.cpu_count() or 1 ) > 1
+    super().__init__( source )
+
+  def _ReadDocument( self, dom_doc_stream : BinaryIO ) -> None:
+    if self._pipelined:
+      with closing( ReadChunksInBackground( dom_doc_stream, FlaFile.STREAM_CHUNK_SIZE ) ) as chunks:
+        self._StreamDocument( chunks )
+    else:
+      self._StreamDocument( iter( lambda: dom_doc_stream.read( FlaFile.STREAM_CHUNK_SIZE ), b'' ) )
+
+  # Frees the unparsed elements of every frame whose elements haven't been accessed yet, e.g.
+  # once a preview has read the frames it needs. Returns the number of frames evicted. Touching
+  # an evicted frame later streams DOMDocument.xml again up to that frame, so this trades memory
+  # for a reparse per frame that comes back.
+  def EvictUntouchedFrames( self ) -> int:
+    evicted : int = 0
+    for timeline in self.timelines:
+      for layer in timeline.layers:
+        for frame in layer.frames:
+          evicted += frame.Evict()
+    return evicted
+
+  # The <elements> subtree of a frame, found by its position in document order: the frame_no-th
+  # DOMFrame of the layer_no-th DOMLayer of the timeline_no-th DOMTimeline, as _StreamDocument
+  # counts them. Only DOMDocument.xml up to that frame is parsed.
+  def _ReadFrameElements( self, ns : str, timeline_no : int, layer_no : int, frame_no : int ) -> ET:
+    position : List[ int ] = [ 0, 0, 0 ]
+    parser   : ET.XMLPullParser = ET.XMLPullParser( events=( 'end', ) )
+    with OpenFlaStorage( self._source ) as fla_storage:
+      with fla_storage.Open( 'DOMDocument.xml' ) as dom_doc_stream:
+        while chunk := dom_doc_stream.read( FlaFile.STREAM_CHUNK_SIZE ):
+          parser.feed( chunk )
+          for _, element in parser.read_events():
+            if element.tag == f'{{{ns}}}DOMFrame':
+              if position == [ timeline_no, layer_no, frame_no ]:
+                return element.find( f'{{{ns}}}elements' )
+              position[ 2 ] += 1
+            elif element.tag == f'{{{ns}}}DOMLayer':
+              position[ 1:3 ] = [ position[ 1 ] + 1, 0 ]
+            elif element.tag == f'{{{ns}}}DOMTimeline':
+              position = [ position[ 0 ] + 1, 0, 0 ]
+            else:
+              continue
+            element.clear()
+    raise ET.ParseError( f'DOMDocument.xml has no frame {frame_no} in layer {layer_no} of timeline {timeline_no}' )
+
+  # Builds timelines, layers and frames as their end tags arrive, then drops the finished
+  # subtree from its parent so only the element currently being parsed is held in memory
+  def _StreamDocument( self, chunks : Iterable[ bytes ] ) -> None:
+    parser : ET.XMLPullParser = ET.XMLPullParser( events=( 'start', 'end' ) )
+    stack  : List[ ET.Element ] = []
+    frames : List[ FlaFile.Frame ] = []
+    layers : List[ FlaFile.Layer ] = []
+    ns     : str = None
+
+    def HandleEvents() -> None:
+      nonlocal frames, layers, ns
+      for event, element in parser.read_events():
+        if event == 'start':
+          if ns is None:
+            m = re.search( r'\{(.*)\}DOMDocument', element.tag )
+            ns = m.group(1)
+            self._ReadDocumentAttributes( element )
+          stack.append( element )
+          continue
+
+        stack.pop()
+        if element.tag == f'{{{ns}}}DOMFrame':
+          reload = partial( self._ReadFrameElements, ns, len( self.timelines ), len( layers ), len( frames ) )
+          frames.append( FlaFile.Frame( element, ns, reload ) )
+        elif element.tag == f'{{{ns}}}DOMLayer':
+          layers.append( FlaFile.Layer( element, ns, frames ) )
+          frames = []
+        elif element.tag == f'{{{ns}}}DOMTimeline':
+          self.timelines.append( FlaFile.Timeline( element, ns, layers ) )
+          layers = []
+        elif len( stack ) != 1:
+          continue
+
+        # this subtree has been consumed (or is a top level section we don't read)
+        if len( stack ) > 0:
+          stack[ -1 ].remove( element )
+
+    for chunk in chunks:
+      parser.feed( chunk )
+      HandleEvents()
+    parser.close()
+    HandleEvents()
@@ -0,0 +1,79 @@
+import io
+import mmap
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Union
+
+#------------------------------------------------------------------------------------------------
+# Where FlaFile reads document members (DOMDocument.xml, LIBRARY/*.xml, bin/*.dat, ...) from.
+# Member names always use '/' separators, as they do inside a .fla archive.
+class FlaStorage:
+  def Open( self, name : str ) -> BinaryIO:
+    raise NotImplementedError
+
+  def Read( self, name : str ) -> bytes:
+    with self.Open( name ) as stream:
+      return stream.read()
+
+  def Exists( self, name : str ) -> bool:
+    raise NotImplementedError
+
+  def Close( self ) -> None:
+    pass
+
+  def __enter__( self ) -> 'FlaStorage':
+    return self
+
+  def __exit__( self, exc_type, exc_value, traceback ) -> None:
+    self.Close()
+
+#------------------------------------------------------------------------------------------------
+# A zipped .fla, given as a path, as its bytes (read in place) or as a seekable binary stream
+class FlaArchiveStorage( FlaStorage ):
+  def __init__( self, source : Union[ Path, bytes, memoryview, BinaryIO ] ) -> None:
+    self.archive : zipfile.ZipFile = zipfile.ZipFile( source, 'r', is_adobe=True, use_mmap=True )
+
+  def Open( self, name : str ) -> BinaryIO:
+    return self.archive.open( name )
+
+  def Read( self, name : str ) -> bytes:
+    return self.archive.read( name )
+
+  def Exists( self, name : str ) -> bool:
+    return name in self.archive.NameToInfo
+
+  def Close( self ) -> None:
+    self.archive.close()
+
+#------------------------------------------------------------------------------------------------
+# An unpacked XFL project folder. path may be the folder itself or the .xfl file inside it.
+# Members are memory mapped rather than read, and nothing needs decompressing.
+class XflDirectoryStorage( FlaStorage ):
+  def __init__( self, path : Path ) -> None:
+    self.root : Path = path if path.is_dir() else path.parent
+    if not ( self.root / 'DOMDocument.xml' ).is_file():
+      raise FileNotFoundError( f'{self.root} is not an XFL project folder' )
+
+  def _MemberPath( self, name : str ) -> Path:
+    return self.root.joinpath( *name.split( '/' ) )
+
+  def Open( self, name : str ) -> BinaryIO:
+    with open( self._MemberPath( name ), 'rb' ) as f:
+      try:
+        return mmap.mmap( f.fileno(), 0, access=mmap.ACCESS_READ )
+      except ValueError:
+        # empty files can't be mapped
+        return io.BytesIO( f.read() )
+
+  def Exists( self, name : str ) -> bool:
+    return self._MemberPath( name ).exists()
+
+#------------------------------------------------------------------------------------------------
+def OpenFlaStorage( source : Union[ Path, bytes, memoryview, BinaryIO ] ) -> FlaStorage:
+  if isinstance( source, Path ):
+    if source.is_dir() or source.suffix.lower() == '.xfl':
+      return XflDirectoryStorage( source )
+  elif isinstance( source, io.BytesIO ):
+    # read the stream's buffer in place instead of through seek + read
+    source = source.getbuffer()
+  return FlaArchiveStorage( source )
@@ -0,0 +1,63 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Checks the startup cost of the headless FlaFile stack with `python -X importtime`.
+# Exits non-zero if importing the module takes longer than the budget, or if it pulls
+# in any module that should only be loaded when it is actually needed.
+
+REPO_DIR : Path = Path( __file__ ).parent
+
+FORBIDDEN_MODULES : List[ str ] = [ 'pdb', 'bz2', 'lzma', 'shutil', 'threading', 'importlib.util', 'PyQt6' ]
+
+#------------------------------------------------------------------------------------------------
+def MeasureImport( module : str ) -> Tuple[ float, Dict[ str, float ] ]:
+  result = subprocess.run( [ sys.executable, '-X', 'importtime', '-c', f'import {module}' ],
+                           cwd=REPO_DIR, capture_output=True, text=True, check=True )
+
+  # lines look like 'import time:   self [us] |   cumulative | <indent>package'
+  cumulative : Dict[ str, float ] = {}
+  for line in result.stderr.splitlines():
+    if not line.startswith( 'import time:' ) or 'cumulative' in line:
+      continue
+    _, cumulative_us, name = line[ len( 'import time:' ): ].split( '|' )
+    cumulative[ name.strip() ] = int( cumulative_us ) / 1000.0
+
+  return cumulative[ module ], cumulative
+
+#------------------------------------------------------------------------------------------------
+if __name__ == '__main__':
+  def ParseArgs():
+    parser = argparse.ArgumentParser()
+    parser.add_argument( '--module', default='flafile', help='Module to import' )
+    parser.add_argument( '--budget-ms', type=float, default=35.0, help='Maximum cumulative import time in milliseconds; importing everything eagerly took about 48 ms' )
+    parser.add_argument( '--runs', type=int, default=5, help='Number of imports to measure; the fastest one is used' )
+    return parser.parse_args()
+  args = ParseArgs()
+
+  # Warm up once with bytecode writing allowed so we measure imports, not compiles
+  warm_env = dict( os.environ )
+  warm_env.pop( 'PYTHONDONTWRITEBYTECODE', None )
+  subprocess.run( [ sys.executable, '-c', f'import {args.module}' ], cwd=REPO_DIR, env=warm_env, check=True )
+
+  best_ms  : float = None
+  imported : Dict[ str, float ] = {}
+  for _ in range( args.runs ):
+    total_ms, imported = MeasureImport( args.module )
+    best_ms = total_ms if best_ms is None else min( best_ms, total_ms )
+
+  failed : bool = False
+  for module in FORBIDDEN_MODULES:
+    if module in imported or any( name.startswith( module + '.' ) for name in imported ):
+      print( f'FAIL: importing {args.module} loads {module}' )
+      failed = True
+
+  print( f'{args.module}: {best_ms:.1f} ms (budget {args.budget_ms:.1f} ms)' )
+  if best_ms > args.budget_ms:
+    print( 'FAIL: import time is over budget' )
+    failed = True
+
+  sys.exit( 1 if failed else 0 )
@@ -1,22 +1,43 @@
 import argparse
 import sys
 from pathlib import Path
-from flafile import FlaFile
-from view_fla import QtFlaWindow
-from PyQt6.QtWidgets import QApplication
+from flafile import FlaDocumentHeader, FlaFile
+
+#------------------------------------------------------------------------------------------------
+def PrintSummary( fla_file : FlaFile ) -> None:
+  print( f'{fla_file.path or "<in memory>"}: {fla_file.width}x{fla_file.height} @ {fla_file.frameRate} fps ({fla_file.versionInfo})' )
+  for timeline in fla_file.timelines:
+    print( f'  {timeline.name}' )
+    for layer in timeline.layers:
+      print( f'    {layer.name}: {len( layer.frames )} keyframes' )
 
 #------------------------------------------------------------------------------------------------
 if __name__ == '__main__':
   def ParseArgs():
     parser = argparse.ArgumentParser()
     parser.add_argument( '--fla', help='Shows which projects contribute which DataFiles to the CodeGen project' )
+    parser.add_argument( '--headless', action='store_true', help='Print a summary of the document instead of opening the viewer' )
+    parser.add_argument( '--header-only', action='store_true', help='Print only the document attributes, without loading any timelines' )
     return parser.parse_args()
   args = ParseArgs()
 
   fla_path = Path( args.fla )
   if fla_path.exists():
+    if args.header_only:
+      header : FlaDocumentHeader = FlaDocumentHeader( fla_path )
+      print( f'{header.path}: {header.width}x{header.height} @ {header.frameRate} fps ({header.versionInfo}) {header.fileGUID}' )
+      sys.exit( 0 )
+
     fla_file : FlaFile = FlaFile( fla_path )
 
+    if args.headless:
+      PrintSummary( fla_file )
+      sys.exit( 0 )
+
+    # Qt is only loaded for the viewer
+    from view_fla import QtFlaWindow
+    from PyQt6.QtWidgets import QApplication
+
     qt_app    : QApplication = QApplication( sys.argv )
     qt_window : QtFlaWindow = QtFlaWindow( fla_file )
     qt_window.show()
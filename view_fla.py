@@ -1,11 +1,9 @@
 import sys
 from enum import Enum
 from PyQt6.QtWidgets import QGraphicsScene, QGraphicsView, QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QLabel, QMainWindow, QScrollArea, QLineEdit, QPushButton
-from PyQt6.QtGui import QBrush, QPen, QColor, QPainter, QPolygonF, QIntValidator
+from PyQt6.QtGui import QBrush, QPen, QColor, QPainter, QPainterPath, QPolygonF, QIntValidator
 from PyQt6.QtCore import Qt, QPointF, QLineF, QObject, QTimer, pyqtSignal, pyqtSlot
-from flafile import FlaFile, FlaShape, FlaStraightEdge
-
-import pdb
+from flafile import FlaFile, FlaShape, FlaEdgeBuffer, FIXED_POINT_ONE
 
 #------------------------------------------------------------------------------
 class FlaSceneWidget( QWidget ):
@@ -24,19 +22,26 @@ class FlaSceneWidget( QWidget ):
     painter.fillRect( self.rect(), QColor( self.fla.backgroundColor ) )
 
     for layer in self.fla.timelines[ self.scene_idx ].layers:
-      if len( layer.frames ) > 0:
-        frame : FlaFile.Frame = layer.frames[ self.frame_idx ]
+      frame : FlaFile.Frame = layer.GetFrameAt( self.frame_idx )
+      if frame is not None:
         for element in frame.elements:
           if isinstance( element, FlaShape ):
             shape : FlaShape = element
             default_pen = QPen( QColor( '#000000' ), 1.0 )
-            for edge in shape.edges:
-              painter.setPen( default_pen )
-
-              straight_edge : FlaStraightEdge = edge
-              qline : QLineF = QLineF( QPointF(straight_edge.pointA[0] / 20.0, straight_edge.pointA[1] / 20.0), 
-                                       QPointF(straight_edge.pointB[0] / 20.0, straight_edge.pointB[1] / 20.0) )
-              painter.drawLine( qline )
+            painter.setPen( default_pen )
+
+            # edge coordinates are fixed point twips; draw straight from the columns
+            edges : FlaEdgeBuffer = shape.edges
+            scale : float = 1.0 / ( FIXED_POINT_ONE * 20.0 )
+            for i in range( len( edges ) ):
+              point_a : QPointF = QPointF( edges.x0[i] * scale, edges.y0[i] * scale )
+              point_b : QPointF = QPointF( edges.x1[i] * scale, edges.y1[i] * scale )
+              if edges.kind[i] == FlaEdgeBuffer.QUADRATIC:
+                qpath : QPainterPath = QPainterPath( point_a )
+                qpath.quadTo( QPointF( edges.cx[i] * scale, edges.cy[i] * scale ), point_b )
+                painter.drawPath( qpath )
+              else:
+                painter.drawLine( QLineF( point_a, point_b ) )
 
 #------------------------------------------------------------------------------
 class FlaTransportModel( QObject ):
@@ -60,10 +65,8 @@ class FlaTransportModel( QObject ):
 
   @pyqtSlot()
   def getMaxFramesInTimeline( self, timeline : FlaFile.Timeline ) -> int :
-    max_len = 0
-    for layer in timeline.layers:
-      max_len = max( max_len, layer.frames[-1].index )
-    return max_len
+    # frame numbers run from 0 to the last frame of the longest layer
+    return max( timeline.frameCount - 1, 0 )
 
   @pyqtSlot()
   def advanceOneFrame( self ) -> None:
@@ -202,7 +205,7 @@ class QtFlaWindow( QMainWindow ):
     super().__init__()
 
     self.fla = fla
-    self.setWindowTitle( str( fla.path.absolute() ) )
+    self.setWindowTitle( str( fla.path.absolute() ) if fla.path is not None else 'Untitled' )
   
     self.scene : FlaSceneWidget = FlaSceneWidget( fla )
 
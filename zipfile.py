@@ -4,19 +4,18 @@ Read and write ZIP files.
 XXX references to utf-8 need further investigation.
 """
 import binascii
-import importlib.util
 import io
 import itertools
 import os
 import posixpath
-import shutil
 import stat
 import struct
 import sys
-import threading
 import time
 import contextlib
-import pathlib
+
+# bz2, lzma, shutil, threading, pathlib and importlib.util are imported where
+# they are first needed, so that reading a deflated archive doesn't pay for them.
 
 try:
     import zlib # We may need its compression method
@@ -25,20 +24,26 @@ except ImportError:
     zlib = None
     crc32 = binascii.crc32
 
-try:
-    import bz2 # We may need its compression method
-except ImportError:
-    bz2 = None
+_compression_modules = {}
 
-try:
-    import lzma # We may need its compression method
-except ImportError:
-    lzma = None
+def _compression_module(name):
+    """Import the bz2 or lzma module on first use; None if it is missing."""
+    try:
+        return _compression_modules[name]
+    except KeyError:
+        pass
+    try:
+        module = __import__(name) # We may need its compression method
+    except ImportError:
+        module = None
+    _compression_modules[name] = module
+    return module
 
 __all__ = ["BadZipFile", "BadZipfile", "error",
            "ZIP_STORED", "ZIP_DEFLATED", "ZIP_BZIP2", "ZIP_LZMA",
            "is_zipfile", "ZipInfo", "ZipFile", "PyZipFile", "LargeZipFile",
-           "Path"]
+           "Path", "BlockCachedFile", "CentralDirCache", "CentralDirIndex",
+           "MemberCache", "MemberCheck", "verify_archives"]
 
 class BadZipFile(Exception):
     pass
@@ -193,6 +198,7 @@ _CD64_OFFSET_START_CENTDIR = 9
 _DD_SIGNATURE = 0x08074b50
 
 _EXTRA_FIELD_STRUCT = struct.Struct('<HH')
+_CENTRAL_DIR_STRUCT = struct.Struct(structCentralDir)
 
 def _strip_extra(extra, xids):
     # Remove Extra Fields with specified IDs.
@@ -581,7 +587,21 @@ def _gen_crc(crc):
 #     zd = _ZipDecrypter(mypwd)
 #     plain_bytes = zd(cypher_bytes)
 
-def _ZipDecrypter(pwd):
+_keystreamtable = None
+def _gen_keystream_table():
+    # The keystream byte only depends on the low 16 bits of key2
+    table = []
+    append = table.append
+    for k in range(0x10000):
+        k |= 2
+        append(((k * (k^1)) >> 8) & 0xFF)
+    return table
+
+# Below this many bytes decrypter() uses the byte-at-a-time routine; the
+# table-driven loop only pays off once the tables are built
+_ZIPCRYPTO_TABLE_MIN = 64
+
+def _ZipDecrypter(pwd, use_table=True):
     key0 = 305419896
     key1 = 591751049
     key2 = 878082192
@@ -605,8 +625,7 @@ def _ZipDecrypter(pwd):
     for p in pwd:
         update_keys(p)
 
-    def decrypter(data):
-        """Decrypt a bytes object."""
+    def decrypt_bytewise(data):
         result = bytearray()
         append = result.append
         for c in data:
@@ -616,6 +635,32 @@ def _ZipDecrypter(pwd):
             append(c)
         return bytes(result)
 
+    def decrypt_table(data):
+        # Same as decrypt_bytewise with update_keys() inlined, the keys in
+        # locals and the keystream byte looked up instead of computed
+        nonlocal key0, key1, key2
+        global _keystreamtable
+        if _keystreamtable is None:
+            _keystreamtable = _gen_keystream_table()
+        keystream = _keystreamtable
+        k0, k1, k2 = key0, key1, key2
+        result = bytearray()
+        append = result.append
+        for c in data:
+            c ^= keystream[k2 & 0xFFFF]
+            append(c)
+            k0 = (k0 >> 8) ^ crctable[(k0 ^ c) & 0xFF]
+            k1 = ((k1 + (k0 & 0xFF)) * 134775813 + 1) & 0xFFFFFFFF
+            k2 = (k2 >> 8) ^ crctable[(k2 ^ (k1 >> 24)) & 0xFF]
+        key0, key1, key2 = k0, k1, k2
+        return bytes(result)
+
+    def decrypter(data):
+        """Decrypt a bytes object."""
+        if use_table and len(data) >= _ZIPCRYPTO_TABLE_MIN:
+            return decrypt_table(data)
+        return decrypt_bytewise(data)
+
     return decrypter
 
 
@@ -625,6 +670,7 @@ class LZMACompressor:
         self._comp = None
 
     def _init(self):
+        lzma = _compression_module('lzma')
         props = lzma._encode_filter_properties({'id': lzma.FILTER_LZMA1})
         self._comp = lzma.LZMACompressor(lzma.FORMAT_RAW, filters=[
             lzma._decode_filter_properties(lzma.FILTER_LZMA1, props)
@@ -658,6 +704,7 @@ class LZMADecompressor:
             if len(self._unconsumed) <= 4 + psize:
                 return b''
 
+            lzma = _compression_module('lzma')
             self._decomp = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[
                 lzma._decode_filter_properties(lzma.FILTER_LZMA1,
                                                self._unconsumed[4:4 + psize])
@@ -698,11 +745,11 @@ def _check_compression(compression):
             raise RuntimeError(
                 "Compression requires the (missing) zlib module")
     elif compression == ZIP_BZIP2:
-        if not bz2:
+        if not _compression_module('bz2'):
             raise RuntimeError(
                 "Compression requires the (missing) bz2 module")
     elif compression == ZIP_LZMA:
-        if not lzma:
+        if not _compression_module('lzma'):
             raise RuntimeError(
                 "Compression requires the (missing) lzma module")
     else:
@@ -716,8 +763,8 @@ def _get_compressor(compress_type, compresslevel=None):
         return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
     elif compress_type == ZIP_BZIP2:
         if compresslevel is not None:
-            return bz2.BZ2Compressor(compresslevel)
-        return bz2.BZ2Compressor()
+            return _compression_module('bz2').BZ2Compressor(compresslevel)
+        return _compression_module('bz2').BZ2Compressor()
     # compresslevel is ignored for ZIP_LZMA
     elif compress_type == ZIP_LZMA:
         return LZMACompressor()
@@ -732,7 +779,7 @@ def _get_decompressor(compress_type):
     elif compress_type == ZIP_DEFLATED:
         return zlib.decompressobj(-15)
     elif compress_type == ZIP_BZIP2:
-        return bz2.BZ2Decompressor()
+        return _compression_module('bz2').BZ2Decompressor()
     elif compress_type == ZIP_LZMA:
         return LZMADecompressor()
     else:
@@ -782,6 +829,82 @@ class _SharedFile:
             self._file = None
             self._close(fileobj)
 
+class _MappedFile:
+    """Read-only file-like view over a memory-mapped archive.
+
+    Reads return memoryview slices of the mapping instead of copies, and
+    every instance keeps its own position so no lock is needed.
+    """
+    def __init__(self, view, pos):
+        self._view = view
+        self._pos = pos
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            pos = offset
+        elif whence == 1:
+            pos = self._pos + offset
+        elif whence == 2:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError("whence must be os.SEEK_SET (0), "
+                             "os.SEEK_CUR (1), or os.SEEK_END (2)")
+        if pos < 0:
+            raise OSError("negative seek position %d" % pos)
+        self._pos = pos
+        return self._pos
+
+    def read(self, n=-1):
+        start = min(self._pos, len(self._view))
+        if n is None or n < 0:
+            end = len(self._view)
+        else:
+            end = min(start + n, len(self._view))
+        self._pos = end
+        return self._view[start:end]
+
+    def close(self):
+        self._view = None
+
+
+class _BufferFile(_MappedFile):
+    """File-like view over an archive held in memory.  Reads return bytes,
+    as from a real file; members are read through _MappedFile views of the
+    same buffer instead."""
+
+    def read(self, n=-1):
+        return super().read(n).tobytes()
+
+
+def _release_mapping(mapping):
+    """Close an mmap, or release a memoryview, used as ZipFile._mmap."""
+    try:
+        if isinstance(mapping, memoryview):
+            mapping.release()
+        else:
+            mapping.close()
+    except BufferError:
+        # Views handed out by getbuffer() are still alive; the mapping is
+        # released when the last of them goes away.
+        pass
+
+
+def _map_file(fp):
+    """Return a read-only mmap of the file object fp, or None if the
+    object cannot be mapped (no file descriptor, empty file, ...)."""
+    import mmap
+    try:
+        return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
 # Provide the tell method for unseekable stream
 class _Tellable:
     def __init__(self, fp):
@@ -803,6 +926,52 @@ class _Tellable:
         self.fp.close()
 
 
+class _SeekIndex:
+    """zran-style seek points for a deflated member.
+
+    While a member is inflated front to back, a copy of the decompressor
+    state is taken every `interval` bytes of output, together with the
+    amount of compressed input consumed and the running CRC at that point.
+    A seek can then resume inflating from the closest preceding point
+    instead of from the start of the member.
+
+    One index is shared by every handle on the member, so points are added
+    and looked up under lock.
+    """
+
+    def __init__(self, interval, lock):
+        self.interval = interval
+        self._lock = lock
+        self._positions = []    # uncompressed offsets, ascending
+        self._points = []       # (compressed offset, decompressor, crc)
+
+    def next_point(self, pos):
+        """Return the uncompressed offset of the first seek point after pos."""
+        return (pos // self.interval + 1) * self.interval
+
+    def add(self, pos, compress_pos, decompressor, crc):
+        # Members are only ever inflated from the start or from an existing
+        # point, so points are reached in order; revisited ones are skipped.
+        point = (compress_pos, decompressor.copy(), crc)
+        with self._lock:
+            if not self._positions or pos > self._positions[-1]:
+                self._positions.append(pos)
+                self._points.append(point)
+
+    def find(self, pos):
+        """Return (pos, compressed offset, decompressor, crc) for the last
+        seek point at or before pos, or None.  The decompressor is a fresh
+        copy that the caller may consume."""
+        import bisect
+        with self._lock:
+            i = bisect.bisect_right(self._positions, pos)
+            if not i:
+                return None
+            point_pos = self._positions[i - 1]
+            compress_pos, decompressor, crc = self._points[i - 1]
+        return point_pos, compress_pos, decompressor.copy(), crc
+
+
 class ZipExtFile(io.BufferedIOBase):
     """File-like object for reading an archive member.
        Is returned by ZipFile.open().
@@ -818,7 +987,7 @@ class ZipExtFile(io.BufferedIOBase):
     MAX_SEEK_READ = 1 << 24
 
     def __init__(self, fileobj, mode, zipinfo, pwd=None,
-                 close_fileobj=False):
+                 close_fileobj=False, seek_index=None):
         self._fileobj = fileobj
         self._pwd = pwd
         self._close_fileobj = close_fileobj
@@ -855,6 +1024,12 @@ class ZipExtFile(io.BufferedIOBase):
         except AttributeError:
             pass
 
+        # Only plain deflated streams have a decompressor state to snapshot
+        if (not self._seekable or self._compress_type != ZIP_DEFLATED
+                or pwd):
+            seek_index = None
+        self._seek_index = seek_index
+
         self._decrypter = None
         if pwd:
             if zipinfo.flag_bits & _MASK_USE_DATA_DESCRIPTOR:
@@ -1025,10 +1200,16 @@ class ZipExtFile(io.BufferedIOBase):
             data = self._read2(n)
 
         if self._compress_type == ZIP_STORED:
+            if isinstance(data, memoryview):
+                # Slices of a mapped archive must not end up in _readbuffer
+                data = data.tobytes()
             self._eof = self._compress_left <= 0
         elif self._compress_type == ZIP_DEFLATED:
             n = max(n, self.MIN_READ_SIZE)
-            data = self._decompressor.decompress(data, n)
+            if self._seek_index is not None:
+                data = self._decompress_indexed(data, n)
+            else:
+                data = self._decompressor.decompress(data, n)
             self._eof = (self._decompressor.eof or
                          self._compress_left <= 0 and
                          not self._decompressor.unconsumed_tail)
@@ -1045,6 +1226,45 @@ class ZipExtFile(io.BufferedIOBase):
         self._update_crc(data)
         return data
 
+    def _decompress_indexed(self, data, n):
+        # Like self._decompressor.decompress(data, n), but stops at every
+        # seek index interval boundary on the way to record a seek point,
+        # so points land on the boundaries whatever size the caller reads.
+        # Input is fed in MIN_READ_SIZE slices so the unconsumed_tail each
+        # point's decompressor copy carries stays small; input that was
+        # not needed is given back to the file.
+        index = self._seek_index
+        decompressor = self._decompressor
+        pos = self._orig_file_size - self._left
+        # compressed offset just past the input fed to the decompressor
+        compress_pos = self._orig_compress_size - self._compress_left - len(data)
+        crc = self._running_crc
+        data = memoryview(data)
+        tail = b''
+        chunks = []
+        while n > 0 and not decompressor.eof:
+            if not tail:
+                if not data:
+                    break
+                tail = data[:self.MIN_READ_SIZE]
+                data = data[self.MIN_READ_SIZE:]
+                compress_pos += len(tail)
+            boundary = index.next_point(pos)
+            chunk = decompressor.decompress(tail, min(n, boundary - pos))
+            tail = decompressor.unconsumed_tail
+            if not chunk:
+                continue
+            chunks.append(chunk)
+            pos += len(chunk)
+            n -= len(chunk)
+            crc = crc32(chunk, crc)
+            if pos == boundary and not decompressor.eof:
+                index.add(pos, compress_pos, decompressor, crc)
+        if data:
+            self._fileobj.seek(self._fileobj.tell() - len(data))
+            self._compress_left += len(data)
+        return b''.join(chunks)
+
     def _read2(self, n):
         if self._compress_left <= 0:
             return b''
@@ -1098,10 +1318,24 @@ class ZipExtFile(io.BufferedIOBase):
         read_offset = new_pos - curr_pos
         buff_offset = read_offset + self._offset
 
+        point = None
+        if self._seek_index is not None:
+            point = self._seek_index.find(new_pos)
+
         if buff_offset >= 0 and buff_offset < len(self._readbuffer):
             # Just move the _offset index if the new position is in the _readbuffer
             self._offset = buff_offset
             read_offset = 0
+        elif point is not None and (read_offset < 0 or point[0] > curr_pos):
+            # Resume inflating from the closest seek point
+            point_pos, compress_pos, self._decompressor, self._running_crc = point
+            self._fileobj.seek(self._orig_compress_start + compress_pos)
+            self._compress_left = self._orig_compress_size - compress_pos
+            self._left = self._orig_file_size - point_pos
+            self._readbuffer = b''
+            self._offset = 0
+            self._eof = False
+            read_offset = new_pos - point_pos
         elif read_offset < 0:
             # Position is before the current position. Reset the ZipExtFile
             self._fileobj.seek(self._orig_compress_start)
@@ -1216,6 +1450,605 @@ class _ZipWriteFile(io.BufferedIOBase):
 
 
 
+class MemberCheck:
+    """Result of checking one archive member with ZipFile.verify()."""
+
+    __slots__ = ('filename', 'header_offset', 'expected_crc', 'actual_crc',
+                 'error')
+
+    def __init__(self, filename, header_offset, expected_crc, actual_crc,
+                 error=None):
+        self.filename = filename
+        self.header_offset = header_offset
+        self.expected_crc = expected_crc
+        self.actual_crc = actual_crc    # None if the member couldn't be read
+        self.error = error              # the exception that stopped reading
+
+    @property
+    def ok(self):
+        return self.error is None and self.actual_crc == self.expected_crc
+
+    def __repr__(self):
+        result = ['<%s filename=%r offset=%r' % (self.__class__.__name__,
+                                                 self.filename,
+                                                 self.header_offset)]
+        if self.expected_crc is not None:
+            result.append(' expected_crc=%#010x' % self.expected_crc)
+        if self.actual_crc is not None:
+            result.append(' actual_crc=%#010x' % self.actual_crc)
+        if self.error is not None:
+            result.append(' error=%r' % self.error)
+        result.append('>')
+        return ''.join(result)
+
+
+def _verify_archive(path, kwargs):
+    try:
+        with ZipFile(path, 'r', **kwargs) as zf:
+            return zf.verify(max_workers=1)
+    except (BadZipFile, OSError, ValueError, NotImplementedError) as e:
+        return [MemberCheck(None, None, None, None, e)]
+
+
+def verify_archives(paths, max_workers=None, suffixes=('.fla', '.zip'),
+                    **kwargs):
+    """Verify many archives on a process pool.
+
+    paths may name archive files or directories; directories are searched
+    recursively for files ending in one of suffixes.  Extra keyword
+    arguments (e.g. is_adobe=True) are passed to ZipFile.  Returns a dict
+    mapping each archive path to the list of MemberCheck results from
+    ZipFile.verify(); an archive that can't be opened at all maps to a
+    single result with filename None and the error.
+    """
+    archives = []
+    for path in paths:
+        path = os.fspath(path)
+        if not os.path.isdir(path):
+            archives.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            archives.extend(os.path.join(dirpath, name)
+                            for name in sorted(filenames)
+                            if name.lower().endswith(suffixes))
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers) as executor:
+        results = executor.map(_verify_archive, archives,
+                               itertools.repeat(kwargs))
+        return dict(zip(archives, results))
+
+
+def _fileno(fp):
+    """Return the file descriptor behind fp, or None if it has none."""
+    try:
+        return fp.fileno()
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
+
+
+def _preallocate(fp, size):
+    """Reserve size bytes for the newly created file fp, if the platform
+    supports it.  This is only a hint, so failures are ignored."""
+    fallocate = getattr(os, 'posix_fallocate', None)
+    if fallocate is None or size <= 0:
+        return
+    with contextlib.suppress(OSError):
+        fallocate(fp.fileno(), 0, size)
+
+
+# Copying between file descriptors needs os.pread() as its last resort, so
+# it is only used where that exists; elsewhere (Windows) members are copied
+# through their file objects.
+_HAVE_FD_COPY = hasattr(os, 'pread')
+
+
+def _copy_file_range(src_fd, dst_fd, offset, count):
+    """Copy count bytes from offset in src_fd to the current position of
+    dst_fd, letting the kernel move the data where possible.  Requires
+    _HAVE_FD_COPY."""
+    for name in ('copy_file_range', 'sendfile'):
+        copy = getattr(os, name, None)
+        if copy is None:
+            continue
+        copied = 0
+        try:
+            while copied < count:
+                if name == 'copy_file_range':
+                    n = copy(src_fd, dst_fd, count - copied, offset + copied)
+                else:
+                    n = copy(dst_fd, src_fd, offset + copied, count - copied)
+                if not n:
+                    raise BadZipFile("Truncated member data")
+                copied += n
+            return
+        except OSError:
+            if copied:
+                raise
+            # not supported for this pair of files; try the next method
+
+    while count > 0:
+        data = os.pread(src_fd, min(count, 1 << 20), offset)
+        if not data:
+            raise BadZipFile("Truncated member data")
+        os.write(dst_fd, data)
+        offset += len(data)
+        count -= len(data)
+
+
+def _file_range_crc(fd, offset, count):
+    """Return the CRC-32 of count bytes at offset in fd.  Requires
+    _HAVE_FD_COPY."""
+    crc = 0
+    while count > 0:
+        data = os.pread(fd, min(count, 1 << 20), offset)
+        if not data:
+            raise BadZipFile("Truncated member data")
+        crc = crc32(data, crc)
+        offset += len(data)
+        count -= len(data)
+    return crc
+
+
+def _file_matches(path, zinfo):
+    """Return True if path is a file with the size and CRC of zinfo."""
+    try:
+        if os.path.getsize(path) != zinfo.file_size:
+            return False
+        crc = 0
+        with open(path, 'rb') as f:
+            while chunk := f.read(1 << 20):
+                crc = crc32(chunk, crc)
+        return crc == zinfo.CRC
+    except OSError:
+        return False
+
+
+class _LRUCache:
+    """Thread-safe mapping that evicts the least recently used entries once
+    the summed size of its values exceeds maxsize.  Every value counts as
+    one unless a sizeof function is given."""
+
+    def __init__(self, maxsize, sizeof=None):
+        self.maxsize = maxsize
+        self._sizeof = sizeof or (lambda value: 1)
+        self._data = {}
+        self._size = 0
+        import threading
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value     # move to the most recent end
+            return value
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._size -= self._sizeof(self._data.pop(key))
+            if size > self.maxsize:
+                return
+            self._data[key] = value
+            self._size += size
+            while self._size > self.maxsize:
+                oldest = next(iter(self._data))
+                self._size -= self._sizeof(self._data.pop(oldest))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+
+class BlockCachedFile:
+    """Read-only file wrapper that reads the underlying file in aligned
+    blocks and keeps the most recently used ones in memory.
+
+    Archives on network filesystems see many small reads (end record probes,
+    30 byte local headers, short decompressor refills) that each cost a round
+    trip.  Here every read is served from cached blocks; missing blocks that
+    are adjacent are fetched with a single read, extended by readahead blocks
+    past the end of the request.  Reads larger than half the cache go
+    straight to the file.  The wrapper is not locked; ZipFile serializes
+    access to its file object already.
+    """
+
+    def __init__(self, raw, block_size=1 << 16, cache_blocks=64, readahead=2):
+        if block_size <= 0 or cache_blocks <= 0 or readahead < 0:
+            raise ValueError("block_size and cache_blocks must be positive "
+                             "and readahead must not be negative")
+        self.raw = raw
+        self.block_size = block_size
+        self.readahead = readahead
+        self._blocks = _LRUCache(cache_blocks)
+        self._bypass = block_size * cache_blocks // 2
+        self._pos = raw.tell()
+        self._size = raw.seek(0, 2)
+        raw.seek(self._pos)
+        self.name = getattr(raw, 'name', None)
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            pos = offset
+        elif whence == 1:
+            pos = self._pos + offset
+        elif whence == 2:
+            pos = self._size + offset
+        else:
+            raise ValueError("whence must be os.SEEK_SET (0), "
+                             "os.SEEK_CUR (1), or os.SEEK_END (2)")
+        if pos < 0:
+            raise OSError("negative seek position %d" % pos)
+        self._pos = pos
+        return self._pos
+
+    def read(self, n=-1):
+        start = min(self._pos, self._size)
+        if n is None or n < 0:
+            end = self._size
+        else:
+            end = min(start + n, self._size)
+        if start >= end:
+            return b''
+        if end - start >= self._bypass:
+            self.raw.seek(start)
+            data = self.raw.read(end - start)
+            self._pos = start + len(data)
+            return data
+
+        bs = self.block_size
+        first = start // bs
+        last = (end - 1) // bs
+        blocks = [self._blocks.get(i) for i in range(first, last + 1)]
+        i = 0
+        while i < len(blocks):
+            if blocks[i] is not None:
+                i += 1
+                continue
+            # Coalesce this run of missing blocks into a single read
+            j = i
+            while j < len(blocks) and blocks[j] is None:
+                j += 1
+            count = j - i
+            if j == len(blocks):
+                count += self.readahead
+            self._fetch(first + i, count, blocks, i)
+            i = j
+
+        data = b''.join(blocks)
+        offset = start - first * bs
+        data = data[offset:offset + end - start]
+        self._pos = start + len(data)
+        return data
+
+    def _fetch(self, block, count, blocks, index):
+        bs = self.block_size
+        self.raw.seek(block * bs)
+        data = self.raw.read(count * bs)
+        for k in range(count):
+            chunk = data[k * bs:(k + 1) * bs]
+            if not chunk:
+                break
+            self._blocks.put(block + k, chunk)
+            if index + k < len(blocks):
+                blocks[index + k] = chunk
+        if index < len(blocks) and blocks[index] is None:
+            raise EOFError("file shrank while reading")
+
+    def close(self):
+        self._blocks.clear()
+        self.raw.close()
+
+    @property
+    def closed(self):
+        return self.raw.closed
+
+
+class CentralDirCache:
+    """Cache of parsed central directories, shared between ZipFile objects.
+
+    Entries are keyed by the identity of the archive file (path, device,
+    inode, size, mtime) and the raw end of central directory record, so a
+    changed file never matches a stale entry.  Up to maxsize directories are
+    kept in memory; if directory is given, entries are also pickled there
+    and survive across processes.
+
+    Pass an instance as ZipFile(..., cd_cache=cache) in read mode.
+    """
+
+    def __init__(self, maxsize=128, directory=None):
+        self._memory = _LRUCache(maxsize)
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _disk_path(self, key):
+        import hashlib
+        digest = hashlib.sha1(repr(key).encode('utf-8', 'surrogatepass'))
+        return os.path.join(self.directory, digest.hexdigest() + '.zcd')
+
+    def get(self, key):
+        entry = self._memory.get(key)
+        if entry is not None or self.directory is None:
+            return entry
+        import pickle
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                stored_key, entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if stored_key != key:
+            return None
+        self._memory.put(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        self._memory.put(key, entry)
+        if self.directory is None:
+            return
+        import pickle
+        path = self._disk_path(key)
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, entry), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def clear(self):
+        """Drop the in-memory entries.  Files on disk are left alone."""
+        self._memory.clear()
+
+
+class MemberCache:
+    """Content-addressed cache of decompressed members, shared between
+    ZipFile objects.
+
+    Entries are keyed by (CRC, compress_size, file_size, compress_type) from
+    the member's ZipInfo, so an unchanged member is found again in any
+    archive that contains it, whatever its name or position.  Values are
+    kept in memory up to maxsize bytes in total; if directory is given they
+    are also written there as plain files and checked against the key's size
+    and CRC when read back.  Stored and encrypted members are not cached.
+
+    Pass an instance as ZipFile(..., member_cache=cache); ZipFile.read()
+    then returns cached bytes without inflating, and without checking the
+    archive's copy of the data.
+    """
+
+    def __init__(self, maxsize=64 << 20, directory=None):
+        self._memory = _LRUCache(maxsize, sizeof=len)
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(zinfo):
+        """Return the cache key for zinfo, or None if it is not cacheable."""
+        if (zinfo.compress_type == ZIP_STORED
+                or zinfo.flag_bits & _MASK_ENCRYPTED):
+            return None
+        return (zinfo.CRC, zinfo.compress_size, zinfo.file_size,
+                zinfo.compress_type)
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, '%08x-%d-%d-%d.zmc' % key)
+
+    def get(self, key):
+        data = self._memory.get(key)
+        if data is not None or self.directory is None:
+            return data
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != key[2] or crc32(data) != key[0]:
+            return None
+        self._memory.put(key, data)
+        return data
+
+    def put(self, key, data):
+        self._memory.put(key, data)
+        if self.directory is None:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+
+    def clear(self):
+        """Drop the in-memory entries.  Files on disk are left alone."""
+        self._memory.clear()
+
+
+def _decode_member_name(filename, flags, metadata_encoding):
+    if flags & _MASK_UTF_FILENAME:
+        # UTF-8 file names extension
+        return filename.decode('utf-8')
+    # Historical ZIP filename encoding
+    return filename.decode(metadata_encoding or 'cp437')
+
+
+def _centdir_zipinfo(centdir, filename, extra, comment, concat):
+    """Build the ZipInfo for an unpacked central directory record."""
+    # Fill the slots directly; ZipInfo.__init__ would only set defaults
+    # that are overwritten here.
+    x = _new_zipinfo(ZipInfo)
+    x.orig_filename = filename
+    if "\0" in filename:
+        filename = filename[0:filename.find("\0")]
+    if os.sep != "/" and os.sep in filename:
+        filename = filename.replace(os.sep, "/")
+    x.filename = filename
+    x._compresslevel = None
+    x.extra = extra
+    x.comment = comment
+    (_, x.create_version, x.create_system, x.extract_version, x.reserved,
+     x.flag_bits, x.compress_type, t, d,
+     x.CRC, x.compress_size, x.file_size, _, _, _,
+     x.volume, x.internal_attr, x.external_attr,
+     x.header_offset) = centdir
+    if x.extract_version > MAX_EXTRACT_VERSION:
+        raise NotImplementedError("zip file version %.1f" %
+                                  (x.extract_version / 10))
+    # Convert date/time code to (year, month, day, hour, min, sec)
+    x._raw_time = t
+    x.date_time = ( (d>>9)+1980, (d>>5)&0xF, d&0x1F,
+                    t>>11, (t>>5)&0x3F, (t&0x1F) * 2 )
+
+    # Only ZIP64 members carry values in the extra field that we need
+    if (x.file_size == 0xFFFFFFFF or x.compress_size == 0xFFFFFFFF
+            or x.header_offset == 0xFFFFFFFF):
+        x._decodeExtra()
+    x.header_offset = x.header_offset + concat
+    return x
+
+_new_zipinfo = object.__new__
+
+
+class CentralDirIndex:
+    """Compact, column-oriented index of a central directory.
+
+    Offsets, sizes, CRCs and compression types are kept in packed arrays
+    (one column per field, one row per member, in archive order) and names
+    are looked up through a name-sorted permutation of the rows.  ZipInfo
+    objects are only built, from the raw directory bytes, when info() is
+    called.
+
+    Used by ZipFile(..., compact_index=True); see ZipFile.index.
+    """
+
+    _centdir = _CENTRAL_DIR_STRUCT
+
+    def __init__(self, data, count, concat=0, metadata_encoding=None):
+        from array import array
+        self._data = bytes(data)
+        self._concat = concat
+        self._metadata_encoding = metadata_encoding
+        self._infos = {}
+        self.names = []
+        self.header_offset = array('Q')
+        self.compress_size = array('Q')
+        self.file_size = array('Q')
+        self.CRC = array('L')
+        self.compress_type = array('H')
+        self._record_offset = array('Q')
+
+        unpack_from = self._centdir.unpack_from
+        view = memoryview(self._data)
+        size_cd = len(view)
+        pos = 0
+        while pos < size_cd and len(self.names) < count:
+            if pos + sizeCentralDir > size_cd:
+                raise BadZipFile("Truncated central directory")
+            centdir = unpack_from(view, pos)
+            if centdir[_CD_SIGNATURE] != stringCentralDir:
+                raise BadZipFile("Bad magic number for central directory")
+            name_start = pos + sizeCentralDir
+            name_end = name_start + centdir[_CD_FILENAME_LENGTH]
+            filename = _decode_member_name(bytes(view[name_start:name_end]),
+                                           centdir[_CD_FLAG_BITS],
+                                           metadata_encoding)
+            # ZipInfo normalizes the name; keep ours consistent with it
+            null_byte = filename.find(chr(0))
+            if null_byte >= 0:
+                filename = filename[0:null_byte]
+            if os.sep != "/" and os.sep in filename:
+                filename = filename.replace(os.sep, "/")
+
+            compress_size = centdir[_CD_COMPRESSED_SIZE]
+            file_size = centdir[_CD_UNCOMPRESSED_SIZE]
+            header_offset = centdir[_CD_LOCAL_HEADER_OFFSET]
+            row = len(self.names)
+            self.names.append(filename)
+            self._record_offset.append(pos)
+            if 0xFFFFFFFF in (compress_size, file_size, header_offset):
+                # The real values live in the ZIP64 extra field
+                x = self.info(row)
+                compress_size, file_size = x.compress_size, x.file_size
+                header_offset = x.header_offset - concat
+            self.header_offset.append(header_offset + concat)
+            self.compress_size.append(compress_size)
+            self.file_size.append(file_size)
+            self.CRC.append(centdir[_CD_CRC])
+            self.compress_type.append(centdir[_CD_COMPRESS_TYPE])
+
+            pos = (name_end + centdir[_CD_EXTRA_FIELD_LENGTH]
+                   + centdir[_CD_COMMENT_LENGTH])
+
+        names = self.names
+        self._order = array('L', sorted(range(len(names)),
+                                        key=names.__getitem__))
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, name):
+        """Return the row of the member called name, or -1.  As with
+        ZipFile.NameToInfo the last of duplicate names wins."""
+        import bisect
+        names = self.names
+        i = bisect.bisect_right(self._order, name, key=names.__getitem__)
+        if i and names[self._order[i - 1]] == name:
+            return self._order[i - 1]
+        return -1
+
+    def info(self, row):
+        """Return the ZipInfo for row, parsing its record on first use."""
+        x = self._infos.get(row)
+        if x is None:
+            view = memoryview(self._data)
+            pos = self._record_offset[row]
+            centdir = self._centdir.unpack_from(view, pos)
+            pos += sizeCentralDir
+            filename = bytes(view[pos:pos + centdir[_CD_FILENAME_LENGTH]])
+            pos += centdir[_CD_FILENAME_LENGTH]
+            extra = bytes(view[pos:pos + centdir[_CD_EXTRA_FIELD_LENGTH]])
+            pos += centdir[_CD_EXTRA_FIELD_LENGTH]
+            comment = bytes(view[pos:pos + centdir[_CD_COMMENT_LENGTH]])
+            x = _centdir_zipinfo(centdir,
+                                 _decode_member_name(filename,
+                                                     centdir[_CD_FLAG_BITS],
+                                                     self._metadata_encoding),
+                                 extra, comment, self._concat)
+            self._infos[row] = x
+        return x
+
+    def infolist(self):
+        return [self.info(row) for row in range(len(self.names))]
+
+
 class ZipFile:
     """ Class with methods to open, read, write, close, list zip files.
 
@@ -1224,6 +2057,8 @@ class ZipFile:
 
     file: Either the path to the file, or a file-like object.
           If it is a path, the file will be opened and closed by ZipFile.
+          In read mode it may also be a bytes-like object holding the
+          whole archive, which is then read in place without copying.
     mode: The mode can be either read 'r', write 'w', exclusive create 'x',
           or append 'a'.
     compression: ZIP_STORED (no compression), ZIP_DEFLATED (requires zlib),
@@ -1236,19 +2071,55 @@ class ZipFile:
                    When using ZIP_STORED or ZIP_LZMA this keyword has no effect.
                    When using ZIP_DEFLATED integers 0 through 9 are accepted.
                    When using ZIP_BZIP2 integers 1 through 9 are accepted.
+    use_mmap: if True and the archive is opened for reading from a real
+              file, the whole file is memory-mapped once and members are
+              read from memoryview slices of the mapping instead of going
+              through seek + read on the shared file object.
+    cd_cache: a CentralDirCache.  When reading, a previously parsed central
+              directory for the same unchanged file is reused instead of
+              being parsed again.
+    compact_index: if True (read mode only), the central directory is kept
+                   as a CentralDirIndex of packed columns and ZipInfo
+                   objects are only created by getinfo(), infolist() or
+                   the first use of filelist/NameToInfo.
+    seek_index_interval: if set, deflated members opened for reading record
+                         a seek point every this many uncompressed bytes.
+                         The points are kept for the life of the ZipFile,
+                         so later seeks in any handle on the same member
+                         resume from the nearest point instead of
+                         re-inflating from the start.
+    block_cache: if True, or a dict of BlockCachedFile keyword arguments
+                 (read mode only), the file is read through a
+                 BlockCachedFile so small reads are served from cached
+                 blocks.
+    member_cache: a MemberCache.  read() returns decompressed members
+                  from it when an identical member has been read before.
 
     """
 
     fp = None                   # Set here since __del__ checks it
+    _mmap = None
+    _index = None
     _windows_illegal_name_trans_table = None
 
     def __init__(self, file, mode="r", compression=ZIP_STORED, allowZip64=True,
                  compresslevel=None, *, strict_timestamps=True, metadata_encoding=None,
-                 is_adobe=False):
+                 is_adobe=False, use_mmap=False, cd_cache=None,
+                 compact_index=False, seek_index_interval=None,
+                 block_cache=None, member_cache=None):
         """Open the ZIP file with mode read 'r', write 'w', exclusive create 'x',
         or append 'a'."""
         if mode not in ('r', 'w', 'x', 'a'):
             raise ValueError("ZipFile requires mode 'r', 'w', 'x', or 'a'")
+        if use_mmap and mode != 'r':
+            raise ValueError("use_mmap is only supported for reading files")
+        if cd_cache is not None and mode != 'r':
+            raise ValueError("cd_cache is only supported for reading files")
+        if compact_index and mode != 'r':
+            raise ValueError(
+                "compact_index is only supported for reading files")
+        if block_cache and mode != 'r':
+            raise ValueError("block_cache is only supported for reading files")
 
         _check_compression(compression)
 
@@ -1265,6 +2136,12 @@ class ZipFile:
         self._strict_timestamps = strict_timestamps
         self.metadata_encoding = metadata_encoding
         self.is_adobe = is_adobe
+        self._cd_cache = cd_cache
+        self._member_cache = member_cache
+        self._compact_index = compact_index
+        self._seek_index_interval = seek_index_interval
+        self._seek_indexes = {}     # header_offset -> _SeekIndex
+        self._replaced = []         # entries dropped by replace()
 
         # Check that we don't try to write with nonconforming codecs
         if self.metadata_encoding and mode != 'r':
@@ -1290,17 +2167,33 @@ class ZipFile:
                         continue
                     raise
                 break
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            # An archive already in memory is read in place, like a mapping
+            if mode != 'r':
+                raise ValueError("buffers are only supported for reading")
+            self._filePassed = 1
+            self._mmap = memoryview(file).cast('B')
+            self.fp = _BufferFile(self._mmap, 0)
+            self.filename = None
         else:
             self._filePassed = 1
             self.fp = file
             self.filename = getattr(file, 'name', None)
         self._fileRefCnt = 1
+        import threading
         self._lock = threading.RLock()
         self._seekable = True
         self._writing = False
 
         try:
             if mode == 'r':
+                if block_cache:
+                    # True for the defaults, or a dict of BlockCachedFile
+                    # keyword arguments
+                    options = {} if block_cache is True else block_cache
+                    self.fp = BlockCachedFile(self.fp, **options)
+                if use_mmap and self._mmap is None:
+                    self._mmap = _map_file(self.fp)
                 self._RealGetContents()
             elif mode in ('w', 'x'):
                 # set the modified flag so central directory gets written
@@ -1335,6 +2228,9 @@ class ZipFile:
             else:
                 raise ValueError("Mode must be 'r', 'w', 'x', or 'a'")
         except:
+            if self._mmap is not None:
+                _release_mapping(self._mmap)
+                self._mmap = None
             fp = self.fp
             self.fp = None
             self._fpclose(fp)
@@ -1375,6 +2271,19 @@ class ZipFile:
         offset_cd = endrec[_ECD_OFFSET]         # offset of central directory
         self._comment = endrec[_ECD_COMMENT]    # archive comment
 
+        cache_key = None
+        if self._cd_cache is not None:
+            cache_key = self._central_dir_key(endrec)
+            entry = cache_key and self._cd_cache.get(cache_key)
+            if entry:
+                self.start_dir, filelist, name_to_info = entry
+                if self._compact_index:
+                    self._use_index(filelist)
+                else:
+                    self.filelist = list(filelist)
+                    self.NameToInfo = dict(name_to_info)
+                return
+
 
 
         # "concat" is zero, unless zip was concatenated to another file
@@ -1392,62 +2301,98 @@ class ZipFile:
             raise BadZipFile("Bad offset for central directory")
         fp.seek(self.start_dir, 0)
         data = fp.read(size_cd)
-        fp = io.BytesIO(data)
-        total = 0
+        if self._compact_index:
+            index = CentralDirIndex(data, endrec[_ECD_ENTRIES_TOTAL], concat,
+                                    self.metadata_encoding)
+            self._use_index(index)
+            if cache_key:
+                self._cd_cache.put(cache_key, (self.start_dir, index, None))
+            return
+        self._parse_central_dir(data, endrec[_ECD_ENTRIES_TOTAL], concat)
+        if self.debug > 2:
+            for x in self.filelist:
+                print("central dir entry", x.filename,
+                      "header at", hex(x.header_offset))
+
+        if cache_key:
+            self._cd_cache.put(cache_key, (self.start_dir, list(self.filelist),
+                                           dict(self.NameToInfo)))
+
+    def _parse_central_dir(self, data, count, concat):
+        """Append a ZipInfo to filelist and NameToInfo for each of the count
+        records in the central directory bytes data."""
+        view = memoryview(data)
+        size_cd = len(view)
+        unpack_from = _CENTRAL_DIR_STRUCT.unpack_from
+        metadata_encoding = self.metadata_encoding or 'cp437'
+        filelist = self.filelist
+        name_to_info = self.NameToInfo
+        append = filelist.append
+        pos = 0
         dir_count = 0
-        while total < size_cd and dir_count < endrec[_ECD_ENTRIES_TOTAL]:
-            if self.debug > 2:
-              print( f"reading central dir entry at location { hex(offset_cd + concat + fp.tell()) }")
-            centdir = fp.read(sizeCentralDir)
-            if len(centdir) != sizeCentralDir:
+        while pos < size_cd and dir_count < count:
+            if pos + sizeCentralDir > size_cd:
                 raise BadZipFile("Truncated central directory")
-            centdir = struct.unpack(structCentralDir, centdir)
+            centdir = unpack_from(view, pos)
             if centdir[_CD_SIGNATURE] != stringCentralDir:
                 raise BadZipFile("Bad magic number for central directory")
-            if self.debug > 2:
-                print(centdir)
-            filename = fp.read(centdir[_CD_FILENAME_LENGTH])
-            flags = centdir[_CD_FLAG_BITS]
-            if flags & _MASK_UTF_FILENAME:
-                # UTF-8 file names extension
-                filename = filename.decode('utf-8')
-            else:
-                # Historical ZIP filename encoding
-                filename = filename.decode(self.metadata_encoding or 'cp437')
-            # Create ZipInfo instance to store file information
-            x = ZipInfo(filename)
-            x.extra = fp.read(centdir[_CD_EXTRA_FIELD_LENGTH])
-            x.comment = fp.read(centdir[_CD_COMMENT_LENGTH])
-            x.header_offset = centdir[_CD_LOCAL_HEADER_OFFSET]
-            (x.create_version, x.create_system, x.extract_version, x.reserved,
-             x.flag_bits, x.compress_type, t, d,
-             x.CRC, x.compress_size, x.file_size) = centdir[1:12]
-            if x.extract_version > MAX_EXTRACT_VERSION:
-                raise NotImplementedError("zip file version %.1f" %
-                                          (x.extract_version / 10))
-            x.volume, x.internal_attr, x.external_attr = centdir[15:18]
-            # Convert date/time code to (year, month, day, hour, min, sec)
-            x._raw_time = t
-            x.date_time = ( (d>>9)+1980, (d>>5)&0xF, d&0x1F,
-                            t>>11, (t>>5)&0x3F, (t&0x1F) * 2 )
-
-            x._decodeExtra()
-            x.header_offset = x.header_offset + concat
-            self.filelist.append(x)
-            self.NameToInfo[x.filename] = x
-
-            # update total bytes read from central directory
-            total = (total + sizeCentralDir + centdir[_CD_FILENAME_LENGTH]
-                     + centdir[_CD_EXTRA_FIELD_LENGTH]
-                     + centdir[_CD_COMMENT_LENGTH])
-
-            if self.debug > 2:
-                print("total", total)
-            dir_count+=1
+            pos += sizeCentralDir
+            end = pos + centdir[_CD_FILENAME_LENGTH]
+            filename = str(view[pos:end],
+                           'utf-8' if centdir[_CD_FLAG_BITS] & _MASK_UTF_FILENAME
+                           else metadata_encoding)
+            pos = end
+            end = pos + centdir[_CD_EXTRA_FIELD_LENGTH]
+            extra = view[pos:end].tobytes() if end > pos else b''
+            pos = end
+            end = pos + centdir[_CD_COMMENT_LENGTH]
+            comment = view[pos:end].tobytes() if end > pos else b''
+            pos = end
+
+            x = _centdir_zipinfo(centdir, filename, extra, comment, concat)
+            append(x)
+            name_to_info[x.filename] = x
+            dir_count += 1
+
+    def _use_index(self, index):
+        # filelist and NameToInfo are built by __getattr__ on first use
+        self._index = index
+        del self.filelist, self.NameToInfo
+
+    def __getattr__(self, name):
+        if name in ('filelist', 'NameToInfo'):
+            index = self.__dict__.get('_index')
+            if index is not None:
+                self.filelist = index.infolist()
+                self.NameToInfo = {x.filename: x for x in self.filelist}
+                return self.__dict__[name]
+        raise AttributeError("%r object has no attribute %r"
+                             % (self.__class__.__name__, name))
+
+    @property
+    def index(self):
+        """The CentralDirIndex of a ZipFile opened with compact_index=True,
+        otherwise None."""
+        return self._index
+
+    def _central_dir_key(self, endrec):
+        """Return the CentralDirCache key identifying this archive, or None
+        if the file's identity can't be determined."""
+        try:
+            st = os.fstat(self.fp.fileno())
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            return None
+        path = (os.path.abspath(self.filename)
+                if isinstance(self.filename, str) else None)
+        return (path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns,
+                tuple(endrec), self.is_adobe, self.metadata_encoding,
+                self._compact_index)
 
 
     def namelist(self):
         """Return a list of file names in the archive."""
+        if 'filelist' not in self.__dict__ and self._index is not None:
+            return list(self._index.names)
         return [data.filename for data in self.filelist]
 
     def infolist(self):
@@ -1479,7 +2424,11 @@ class ZipFile:
 
     def getinfo(self, name):
         """Return the instance of ZipInfo given 'name'."""
-        info = self.NameToInfo.get(name)
+        if 'NameToInfo' not in self.__dict__ and self._index is not None:
+            row = self._index.find(name)
+            info = self._index.info(row) if row >= 0 else None
+        else:
+            info = self.NameToInfo.get(name)
         if info is None:
             raise KeyError(
                 'There is no item named %r in the archive' % name)
@@ -1515,9 +2464,132 @@ class ZipFile:
 
     def read(self, name, pwd=None):
         """Return file bytes for name."""
+        if self._member_cache is not None:
+            zinfo = name if isinstance(name, ZipInfo) else self.getinfo(name)
+            key = MemberCache.key(zinfo)
+            if key is not None:
+                data = self._member_cache.get(key)
+                if data is None:
+                    with self.open(zinfo, "r", pwd) as fp:
+                        data = fp.read()
+                    self._member_cache.put(key, data)
+                return data
         with self.open(name, "r", pwd) as fp:
             return fp.read()
 
+    def getbuffer(self, name, pwd=None):
+        """Return a read-only memoryview of the contents of name.
+
+        When the archive is memory-mapped and the member is stored without
+        compression or encryption, the view is a zero-copy slice of the
+        mapping.  Otherwise the member is read and wrapped in a memoryview.
+        """
+        with self.open(name, "r", pwd) as fp:
+            if (isinstance(fp._fileobj, _MappedFile) and
+                    fp._compress_type == ZIP_STORED and
+                    fp._decrypter is None):
+                view = fp._fileobj.read(fp._compress_left)
+                if len(view) != fp._compress_left:
+                    raise EOFError
+                if (fp._expected_crc is not None and
+                        crc32(view) != fp._expected_crc):
+                    raise BadZipFile("Bad CRC-32 for file %r" % fp.name)
+                return view
+            return memoryview(fp.read()).toreadonly()
+
+    def read_many(self, names, pwd=None, max_workers=None):
+        """Return a dict mapping each of names to its file bytes.
+
+        Members are read in header_offset order so the archive is walked
+        sequentially, and are decompressed on a pool of max_workers threads.
+        When the archive was opened from a filename each worker reads through
+        its own file handle instead of the shared, locked one; a memory-mapped
+        archive is read directly from the mapping.
+        """
+        infos = [name if isinstance(name, ZipInfo) else self.getinfo(name)
+                 for name in names]
+        infos.sort(key=lambda zinfo: zinfo.header_offset)
+        data = self._map_members(lambda zef: zef.read(), infos, pwd,
+                                 max_workers)
+        return {zinfo.filename: buf for zinfo, buf in zip(infos, data)}
+
+    def verify(self, pwd=None, max_workers=None):
+        """Check the CRC of every member, reading them in parallel.
+
+        Returns a list of MemberCheck results, one per member in
+        header_offset order.  Unlike testzip() every member is checked and
+        members that can't be read at all are reported instead of raising.
+        """
+        chunk_size = 2 ** 20
+        infos = sorted(self.infolist(), key=lambda zinfo: zinfo.header_offset)
+
+        def check(zef):
+            zef._expected_crc = None    # we compare the CRC ourselves
+            crc = 0
+            while True:
+                data = zef.read(chunk_size)
+                if not data:
+                    return crc
+                crc = crc32(data, crc)
+
+        results = self._map_members(check, infos, pwd, max_workers,
+                                    return_exceptions=True)
+        return [MemberCheck(zinfo.filename, zinfo.header_offset, zinfo.CRC,
+                            None if isinstance(crc, Exception) else crc,
+                            crc if isinstance(crc, Exception) else None)
+                for zinfo, crc in zip(infos, results)]
+
+    def _map_members(self, func, infos, pwd, max_workers,
+                     return_exceptions=False):
+        """Return a list of func(ZipExtFile) for each of infos, run on a
+        thread pool.  With return_exceptions errors are returned in place of
+        the result instead of being raised."""
+        if not self.fp:
+            raise ValueError(
+                "Attempt to use ZIP archive that was already closed")
+        if self._writing:
+            raise ValueError("Can't read from the ZIP file while there "
+                    "is an open writing handle on it. "
+                    "Close the writing handle before trying to read.")
+
+        if self._mmap is not None or self._filePassed:
+            # The mapping needs no lock; a caller-supplied file object can't
+            # be reopened, so its reads stay serialized on self._lock.
+            def open_member(zinfo):
+                return self.open(zinfo, pwd=pwd)
+            handles = None
+        else:
+            import threading
+            local = threading.local()
+            handles = []
+            def open_member(zinfo):
+                fp = getattr(local, 'fp', None)
+                if fp is None:
+                    fp = local.fp = io.open(self.filename, 'rb')
+                    handles.append(fp)
+                fp.seek(zinfo.header_offset)
+                member_pwd = self._read_member_header(zinfo, fp, pwd,
+                                                      zinfo.filename)
+                return ZipExtFile(fp, 'r', zinfo, member_pwd)
+
+        def run(zinfo):
+            try:
+                with open_member(zinfo) as zef:
+                    return func(zef)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        from concurrent.futures import ThreadPoolExecutor
+        try:
+            with ThreadPoolExecutor(max_workers) as executor:
+                return list(executor.map(run, infos))
+        finally:
+            if handles is not None:
+                for fp in handles:
+                    fp.close()
+
     def open(self, name, mode="r", pwd=None, *, force_zip64=False):
         """Return file-like object for 'name'.
 
@@ -1563,59 +2635,77 @@ class ZipFile:
                     "Close the writing handle before trying to read.")
 
         # Open for reading:
-        self._fileRefCnt += 1
-        zef_file = _SharedFile(self.fp, zinfo.header_offset,
-                               self._fpclose, self._lock, lambda: self._writing)
+        if self._mmap is not None:
+            zef_file = _MappedFile(memoryview(self._mmap), zinfo.header_offset)
+        else:
+            self._fileRefCnt += 1
+            zef_file = _SharedFile(self.fp, zinfo.header_offset,
+                                   self._fpclose, self._lock, lambda: self._writing)
         try:
-            # Skip the file header:
-            fheader = zef_file.read(sizeFileHeader)
-            if len(fheader) != sizeFileHeader:
-                raise BadZipFile("Truncated file header")
-            fheader = struct.unpack(structFileHeader, fheader)
-            if fheader[_FH_SIGNATURE] != stringFileHeader:
-                raise BadZipFile("Bad magic number for file header")
-
-            fname = zef_file.read(fheader[_FH_FILENAME_LENGTH])
-            if fheader[_FH_EXTRA_FIELD_LENGTH]:
-                zef_file.read(fheader[_FH_EXTRA_FIELD_LENGTH])
-
-            if zinfo.flag_bits & _MASK_COMPRESSED_PATCH:
-                # Zip 2.7: compressed patched data
-                raise NotImplementedError("compressed patched data (flag bit 5)")
-
-            if zinfo.flag_bits & _MASK_STRONG_ENCRYPTION:
-                # strong encryption
-                raise NotImplementedError("strong encryption (flag bit 6)")
-
-            if fheader[_FH_GENERAL_PURPOSE_FLAG_BITS] & _MASK_UTF_FILENAME:
-                # UTF-8 filename
-                fname_str = fname.decode("utf-8")
-            else:
-                fname_str = fname.decode(self.metadata_encoding or "cp437")
-
-            if fname_str != zinfo.orig_filename:
-                raise BadZipFile(
-                    'File name in directory %r and header %r differ.'
-                    % (zinfo.orig_filename, fname))
-
-            # check for encrypted flag & handle password
-            is_encrypted = zinfo.flag_bits & _MASK_ENCRYPTED
-            if is_encrypted:
-                if not pwd:
-                    pwd = self.pwd
-                if pwd and not isinstance(pwd, bytes):
-                    raise TypeError("pwd: expected bytes, got %s" % type(pwd).__name__)
-                if not pwd:
-                    raise RuntimeError("File %r is encrypted, password "
-                                       "required for extraction" % name)
-            else:
-                pwd = None
-
-            return ZipExtFile(zef_file, mode, zinfo, pwd, True)
+            pwd = self._read_member_header(zinfo, zef_file, pwd, name)
+            seek_index = None
+            if self._seek_index_interval:
+                with self._lock:
+                    seek_index = self._seek_indexes.get(zinfo.header_offset)
+                    if seek_index is None:
+                        import threading
+                        seek_index = _SeekIndex(self._seek_index_interval,
+                                                threading.Lock())
+                        self._seek_indexes[zinfo.header_offset] = seek_index
+            return ZipExtFile(zef_file, mode, zinfo, pwd, True, seek_index)
         except:
             zef_file.close()
             raise
 
+    def _read_member_header(self, zinfo, zef_file, pwd, name):
+        """Consume the local file header of zinfo from zef_file, which must
+        be positioned at zinfo.header_offset, and return the password to
+        decrypt the member with (None if it is not encrypted)."""
+        # Skip the file header:
+        fheader = zef_file.read(sizeFileHeader)
+        if len(fheader) != sizeFileHeader:
+            raise BadZipFile("Truncated file header")
+        fheader = struct.unpack(structFileHeader, fheader)
+        if fheader[_FH_SIGNATURE] != stringFileHeader:
+            raise BadZipFile("Bad magic number for file header")
+
+        fname = bytes(zef_file.read(fheader[_FH_FILENAME_LENGTH]))
+        if fheader[_FH_EXTRA_FIELD_LENGTH]:
+            zef_file.read(fheader[_FH_EXTRA_FIELD_LENGTH])
+
+        if zinfo.flag_bits & _MASK_COMPRESSED_PATCH:
+            # Zip 2.7: compressed patched data
+            raise NotImplementedError("compressed patched data (flag bit 5)")
+
+        if zinfo.flag_bits & _MASK_STRONG_ENCRYPTION:
+            # strong encryption
+            raise NotImplementedError("strong encryption (flag bit 6)")
+
+        if fheader[_FH_GENERAL_PURPOSE_FLAG_BITS] & _MASK_UTF_FILENAME:
+            # UTF-8 filename
+            fname_str = fname.decode("utf-8")
+        else:
+            fname_str = fname.decode(self.metadata_encoding or "cp437")
+
+        if fname_str != zinfo.orig_filename:
+            raise BadZipFile(
+                'File name in directory %r and header %r differ.'
+                % (zinfo.orig_filename, fname))
+
+        # check for encrypted flag & handle password
+        is_encrypted = zinfo.flag_bits & _MASK_ENCRYPTED
+        if is_encrypted:
+            if not pwd:
+                pwd = self.pwd
+            if pwd and not isinstance(pwd, bytes):
+                raise TypeError("pwd: expected bytes, got %s" % type(pwd).__name__)
+            if not pwd:
+                raise RuntimeError("File %r is encrypted, password "
+                                   "required for extraction" % name)
+        else:
+            pwd = None
+        return pwd
+
     def _open_to_write(self, zinfo, force_zip64=False):
         if force_zip64 and not self._allowZip64:
             raise ValueError(
@@ -1671,11 +2761,15 @@ class ZipFile:
 
         return self._extract_member(member, path, pwd)
 
-    def extractall(self, path=None, members=None, pwd=None):
+    def extractall(self, path=None, members=None, pwd=None, *,
+                   max_workers=1, skip_unchanged=False):
         """Extract all members from the archive to the current working
            directory. `path' specifies a different directory to extract to.
            `members' is optional and must be a subset of the list returned
-           by namelist().
+           by namelist().  With max_workers other than 1 files are extracted
+           on a thread pool (None picks the pool's default size).  With
+           skip_unchanged, files already on disk with the member's size and
+           CRC are left alone.
         """
         if members is None:
             members = self.namelist()
@@ -1685,8 +2779,16 @@ class ZipFile:
         else:
             path = os.fspath(path)
 
-        for zipinfo in members:
-            self._extract_member(zipinfo, path, pwd)
+        if max_workers == 1:
+            for zipinfo in members:
+                self._extract_member(zipinfo, path, pwd, skip_unchanged)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as executor:
+            for _ in executor.map(lambda zipinfo: self._extract_member(
+                    zipinfo, path, pwd, skip_unchanged), members):
+                pass
 
     @classmethod
     def _sanitize_windows_name(cls, arcname, pathsep):
@@ -1703,9 +2805,14 @@ class ZipFile:
         arcname = pathsep.join(x for x in arcname if x)
         return arcname
 
-    def _extract_member(self, member, targetpath, pwd):
+    def _extract_member(self, member, targetpath, pwd, skip_unchanged=False):
         """Extract the ZipInfo object 'member' to a physical
            file on the path targetpath.
+
+           Stored, unencrypted members are copied by the kernel
+           (copy_file_range or sendfile) when both files have descriptors;
+           their CRC is then checked over the source range, from the
+           mapping when the archive is memory mapped.
         """
         if not isinstance(member, ZipInfo):
             member = self.getinfo(member)
@@ -1732,16 +2839,36 @@ class ZipFile:
         # Create all upper directories if necessary.
         upperdirs = os.path.dirname(targetpath)
         if upperdirs and not os.path.exists(upperdirs):
-            os.makedirs(upperdirs)
+            os.makedirs(upperdirs, exist_ok=True)
 
         if member.is_dir():
             if not os.path.isdir(targetpath):
-                os.mkdir(targetpath)
+                os.makedirs(targetpath, exist_ok=True)
+            return targetpath
+
+        if skip_unchanged and _file_matches(targetpath, member):
             return targetpath
 
+        import shutil
         with self.open(member, pwd=pwd) as source, \
              open(targetpath, "wb") as target:
-            shutil.copyfileobj(source, target)
+            _preallocate(target, member.file_size)
+            src_fd = _fileno(self.fp)
+            if (_HAVE_FD_COPY and src_fd is not None
+                    and source._compress_type == ZIP_STORED
+                    and source._decrypter is None and source._seekable):
+                start = source._orig_compress_start
+                end = start + member.file_size
+                _copy_file_range(src_fd, target.fileno(),
+                                 start, member.file_size)
+                if self._mmap is not None:
+                    crc = crc32(memoryview(self._mmap)[start:end])
+                else:
+                    crc = _file_range_crc(src_fd, start, member.file_size)
+                if crc != member.CRC:
+                    raise BadZipFile("Bad CRC-32 for file %r" % member.filename)
+            else:
+                shutil.copyfileobj(source, target)
 
         return targetpath
 
@@ -1798,6 +2925,7 @@ class ZipFile:
             else:
                 zinfo._compresslevel = self.compresslevel
 
+            import shutil
             with open(filename, "rb") as src, self.open(zinfo, 'w') as dest:
                 shutil.copyfileobj(src, dest, 1024*8)
 
@@ -1810,18 +2938,7 @@ class ZipFile:
         the name of the file in the archive."""
         if isinstance(data, str):
             data = data.encode("utf-8")
-        if not isinstance(zinfo_or_arcname, ZipInfo):
-            zinfo = ZipInfo(filename=zinfo_or_arcname,
-                            date_time=time.localtime(time.time())[:6])
-            zinfo.compress_type = self.compression
-            zinfo._compresslevel = self.compresslevel
-            if zinfo.filename[-1] == '/':
-                zinfo.external_attr = 0o40775 << 16   # drwxrwxr-x
-                zinfo.external_attr |= 0x10           # MS-DOS directory flag
-            else:
-                zinfo.external_attr = 0o600 << 16     # ?rw-------
-        else:
-            zinfo = zinfo_or_arcname
+        zinfo = self._arcname_zinfo(zinfo_or_arcname)
 
         if not self.fp:
             raise ValueError(
@@ -1842,6 +2959,191 @@ class ZipFile:
             with self.open(zinfo, mode='w') as dest:
                 dest.write(data)
 
+    def _arcname_zinfo(self, zinfo_or_arcname):
+        """Return zinfo_or_arcname as a ZipInfo, creating one with the
+        archive's defaults if it is a name."""
+        if isinstance(zinfo_or_arcname, ZipInfo):
+            return zinfo_or_arcname
+        zinfo = ZipInfo(filename=zinfo_or_arcname,
+                        date_time=time.localtime(time.time())[:6])
+        zinfo.compress_type = self.compression
+        zinfo._compresslevel = self.compresslevel
+        if zinfo.filename[-1] == '/':
+            zinfo.external_attr = 0o40775 << 16   # drwxrwxr-x
+            zinfo.external_attr |= 0x10           # MS-DOS directory flag
+        else:
+            zinfo.external_attr = 0o600 << 16     # ?rw-------
+        return zinfo
+
+    def writestr_many(self, members, max_workers=None):
+        """Write many members at once, compressing them in parallel.
+
+        members is an iterable of (zinfo_or_arcname, data) pairs, as taken
+        by writestr().  The data is compressed on a pool of max_workers
+        threads into memory and the results are written in the order given.
+        For Adobe archives (is_adobe=True) a 'mimetype' member is stored
+        uncompressed and written first, as Animate expects.
+        """
+        if not self.fp:
+            raise ValueError(
+                "Attempt to write to ZIP archive that was already closed")
+        if self._writing:
+            raise ValueError(
+                "Can't write to ZIP archive while an open writing handle exists."
+            )
+        members = [(self._arcname_zinfo(zinfo_or_arcname),
+                    data.encode("utf-8") if isinstance(data, str) else data)
+                   for zinfo_or_arcname, data in members]
+        if self.is_adobe:
+            members.sort(key=lambda member: member[0].filename != 'mimetype')
+            if members and members[0][0].filename == 'mimetype':
+                members[0][0].compress_type = ZIP_STORED
+        for zinfo, data in members:
+            _check_compression(zinfo.compress_type)
+
+        def compress(member):
+            zinfo, data = member
+            compressor = _get_compressor(zinfo.compress_type,
+                                         zinfo._compresslevel)
+            if compressor is not None:
+                data = compressor.compress(data) + compressor.flush()
+            return zinfo, crc32(member[1]), len(member[1]), data
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers) as executor:
+            for result in executor.map(compress, members):
+                self._write_compressed(*result)
+
+    def _write_compressed(self, zinfo, crc, file_size, data):
+        """Write zinfo with data that has already been compressed with
+        zinfo.compress_type."""
+        zinfo.CRC = crc
+        zinfo.file_size = file_size
+        zinfo.compress_size = len(data)
+        zinfo.flag_bits = 0x00
+        if zinfo.compress_type == ZIP_LZMA:
+            # Compressed data includes an end-of-stream (EOS) marker
+            zinfo.flag_bits |= _MASK_COMPRESS_OPTION_1
+        if not zinfo.external_attr:
+            zinfo.external_attr = 0o600 << 16  # permissions: ?rw-------
+
+        zip64 = (zinfo.file_size > ZIP64_LIMIT or
+                 zinfo.compress_size > ZIP64_LIMIT)
+        if not self._allowZip64 and zip64:
+            raise LargeZipFile("Filesize would require ZIP64 extensions")
+
+        with self._lock:
+            if self._seekable:
+                self.fp.seek(self.start_dir)
+            zinfo.header_offset = self.fp.tell()
+            self._writecheck(zinfo)
+            self._didModify = True
+
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(data)
+            self.start_dir = self.fp.tell()
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+
+    def replace(self, zinfo_or_arcname, data,
+                compress_type=None, compresslevel=None):
+        """Replace the member zinfo_or_arcname with data, adding it if it
+        does not exist yet.  Requires mode 'a'.
+
+        The new contents are written after the last member, over the old
+        central directory, and the old entry is dropped from the directory.
+        Closing the archive then only writes the new central directory.  The
+        bytes of the old member stay in the file until compact() is called.
+        Unless compress_type is given, the old member's compression is kept.
+        """
+        if self.mode != 'a':
+            raise ValueError("replace() requires mode 'a'")
+        if isinstance(zinfo_or_arcname, ZipInfo):
+            name = zinfo_or_arcname.filename
+        else:
+            name = zinfo_or_arcname
+        with self._lock:
+            old = self.NameToInfo.pop(name, None)
+            if old is not None and compress_type is None:
+                compress_type = old.compress_type
+            try:
+                self.writestr(zinfo_or_arcname, data,
+                              compress_type, compresslevel)
+            except:
+                if old is not None and name not in self.NameToInfo:
+                    self.NameToInfo[name] = old
+                raise
+            new = self.NameToInfo[name]
+            replaced = [x for x in self.filelist
+                        if x.filename == name and x is not new]
+            for x in replaced:
+                self._seek_indexes.pop(x.header_offset, None)
+            self._replaced.extend(replaced)
+            self.filelist = [x for x in self.filelist
+                             if x.filename != name or x is new]
+
+    def compact(self):
+        """Squeeze out the space left behind by replace() by moving the
+        remaining members down over it.  Requires mode 'a'; the central
+        directory is written and the file truncated on close()."""
+        if self.mode != 'a':
+            raise ValueError("compact() requires mode 'a'")
+        if not self.fp:
+            raise ValueError(
+                "Attempt to write to ZIP archive that was already closed")
+        if self._writing:
+            raise ValueError("Can't compact the ZIP file while there is "
+                             "an open writing handle on it.")
+        chunk_size = 1 << 20
+        with self._lock:
+            members = sorted(self.filelist, key=lambda x: x.header_offset)
+            offsets = [x.header_offset for x in members + self._replaced]
+            pos = min(offsets) if offsets else self.start_dir
+            for zinfo in members:
+                length = self._member_length(zinfo)
+                src = zinfo.header_offset
+                if src != pos:
+                    moved = 0
+                    while moved < length:
+                        self.fp.seek(src + moved)
+                        chunk = self.fp.read(min(chunk_size, length - moved))
+                        if not chunk:
+                            raise BadZipFile("Truncated member %r"
+                                             % zinfo.filename)
+                        self.fp.seek(pos + moved)
+                        self.fp.write(chunk)
+                        moved += len(chunk)
+                    zinfo.header_offset = pos
+                pos += length
+            self.start_dir = pos
+            self._replaced = []
+            # seek points are keyed by header offset, which members moved
+            self._seek_indexes.clear()
+            self._didModify = True
+
+    def _member_length(self, zinfo):
+        """Return the number of bytes zinfo occupies in the file: local
+        header, data and data descriptor."""
+        self.fp.seek(zinfo.header_offset)
+        fheader = self.fp.read(sizeFileHeader)
+        if len(fheader) != sizeFileHeader:
+            raise BadZipFile("Truncated file header")
+        fheader = struct.unpack(structFileHeader, fheader)
+        if fheader[_FH_SIGNATURE] != stringFileHeader:
+            raise BadZipFile("Bad magic number for file header")
+        self.fp.read(fheader[_FH_FILENAME_LENGTH])
+        extra = self.fp.read(fheader[_FH_EXTRA_FIELD_LENGTH])
+        length = (sizeFileHeader + fheader[_FH_FILENAME_LENGTH]
+                  + fheader[_FH_EXTRA_FIELD_LENGTH] + zinfo.compress_size)
+        if zinfo.flag_bits & _MASK_USE_DATA_DESCRIPTOR:
+            zip64 = len(_strip_extra(extra, (1,))) != len(extra)
+            self.fp.seek(zinfo.header_offset + length)
+            sig = self.fp.read(4)
+            if len(sig) == 4 and struct.unpack('<L', sig)[0] == _DD_SIGNATURE:
+                length += 4
+            length += 4 + (16 if zip64 else 8)
+        return length
+
     def mkdir(self, zinfo_or_directory_name, mode=511):
         """Creates a directory inside the zip archive."""
         if isinstance(zinfo_or_directory_name, ZipInfo):
@@ -1899,6 +3201,10 @@ class ZipFile:
                         self.fp.seek(self.start_dir)
                     self._write_end_record()
         finally:
+            if self._mmap is not None:
+                mapping = self._mmap
+                self._mmap = None
+                _release_mapping(mapping)
             fp = self.fp
             self.fp = None
             self._fpclose(fp)
@@ -2115,6 +3421,7 @@ class PyZipFile(ZipFile):
 
         file_py  = pathname + ".py"
         file_pyc = pathname + ".pyc"
+        import importlib.util
         pycache_opt0 = importlib.util.cache_from_source(file_py, optimization='')
         pycache_opt1 = importlib.util.cache_from_source(file_py, optimization=1)
         pycache_opt2 = importlib.util.cache_from_source(file_py, optimization=2)
@@ -2219,29 +3526,31 @@ def _ancestry(path):
         path, tail = posixpath.split(path)
 
 
-_dedupe = dict.fromkeys
-"""Deduplicate an iterable in original order"""
-
-
-def _difference(minuend, subtrahend):
-    """
-    Return items in minuend not in subtrahend, retaining order
-    with O(1) lookup.
-    """
-    return itertools.filterfalse(set(subtrahend).__contains__, minuend)
-
-
 class CompleteDirs(ZipFile):
     """
     A ZipFile subclass that ensures that implied directories
     are always included in the namelist.
     """
 
+    _text_cache = None
+
     @staticmethod
     def _implied_dirs(names):
-        parents = itertools.chain.from_iterable(map(_parents, names))
-        as_dirs = (p + posixpath.sep for p in parents)
-        return _dedupe(_difference(as_dirs, names))
+        # Same result as deduplicating the parents of every name, but stops
+        # walking up at the first parent already seen; its ancestors were
+        # handled then, so each directory is visited once.
+        names_set = set(names)
+        seen = set()
+        implied = {}
+        for name in names:
+            for parent in _parents(name):
+                as_dir = parent + posixpath.sep
+                if as_dir in seen:
+                    break
+                seen.add(as_dir)
+                if as_dir not in names_set:
+                    implied[as_dir] = None
+        return implied
 
     def namelist(self):
         names = super(CompleteDirs, self).namelist()
@@ -2250,6 +3559,14 @@ class CompleteDirs(ZipFile):
     def _name_set(self):
         return set(self.namelist())
 
+    def _children(self, at):
+        """
+        Return the names directly inside the directory at.
+        """
+        parent = at.rstrip("/")
+        return [name for name in self.namelist()
+                if posixpath.dirname(name.rstrip("/")) == parent]
+
     def resolve_dir(self, name):
         """
         If the name represents a directory, return that name
@@ -2309,6 +3626,28 @@ class FastLookup(CompleteDirs):
         self.__lookup = super(FastLookup, self)._name_set()
         return self.__lookup
 
+    def _tree(self):
+        # directory (without trailing slash) -> names directly inside it
+        with contextlib.suppress(AttributeError):
+            return self.__tree
+        tree = {}
+        for name in self.namelist():
+            parent = posixpath.dirname(name.rstrip("/"))
+            tree.setdefault(parent, []).append(name)
+        self.__tree = tree
+        return self.__tree
+
+    def _children(self, at):
+        return self._tree().get(at.rstrip("/"), [])
+
+    @property
+    def _text_cache(self):
+        # decoded text of members read through Path.read_text()
+        with contextlib.suppress(AttributeError):
+            return self.__texts
+        self.__texts = _LRUCache(16 << 20, sizeof=len)
+        return self.__texts
+
 
 def _extract_text_encoding(encoding=None, *args, **kwargs):
     # stacklevel=3 so that the caller of the caller see any warning.
@@ -2430,36 +3769,47 @@ class Path:
 
     @property
     def name(self):
+        import pathlib
         return pathlib.Path(self.at).name or self.filename.name
 
     @property
     def suffix(self):
+        import pathlib
         return pathlib.Path(self.at).suffix or self.filename.suffix
 
     @property
     def suffixes(self):
+        import pathlib
         return pathlib.Path(self.at).suffixes or self.filename.suffixes
 
     @property
     def stem(self):
+        import pathlib
         return pathlib.Path(self.at).stem or self.filename.stem
 
     @property
     def filename(self):
+        import pathlib
         return pathlib.Path(self.root.filename).joinpath(self.at)
 
     def read_text(self, *args, **kwargs):
         encoding, args, kwargs = _extract_text_encoding(*args, **kwargs)
-        with self.open('r', encoding, *args, **kwargs) as strm:
-            return strm.read()
+        cache = self.root._text_cache
+        if cache is None:
+            with self.open('r', encoding, *args, **kwargs) as strm:
+                return strm.read()
+        key = (self.at, encoding, args, tuple(sorted(kwargs.items())))
+        text = cache.get(key)
+        if text is None:
+            with self.open('r', encoding, *args, **kwargs) as strm:
+                text = strm.read()
+            cache.put(key, text)
+        return text
 
     def read_bytes(self):
         with self.open('rb') as strm:
             return strm.read()
 
-    def _is_child(self, path):
-        return posixpath.dirname(path.at.rstrip("/")) == self.at.rstrip("/")
-
     def _next(self, at):
         return self.__class__(self.root, at)
 
@@ -2475,8 +3825,7 @@ class Path:
     def iterdir(self):
         if not self.is_dir():
             raise ValueError("Can't listdir a file")
-        subs = map(self._next, self.root.namelist())
-        return filter(self._is_child, subs)
+        return map(self._next, self.root._children(self.at))
 
     def __str__(self):
         return posixpath.join(self.root.filename, self.at)